@@ -0,0 +1,470 @@
+"""Headless Benchmarks für die heißen Pfade von World und Game.
+
+Läuft ohne Display (SDL Dummy-Treiber, Off-Screen Surfaces) und schreibt
+die Ergebnisse als JSON. Mit --baseline wird gegen eine gespeicherte
+Ergebnisdatei verglichen; der Exit-Code ist 1, wenn ein Pfad um mehr als
+--threshold langsamer geworden ist. Unter "memory" steht zusätzlich der
+Speicher pro Tile (tracemalloc), einmal für die alten Tile-Dicts und
+einmal für das TileGrid.
+
+    python benchmark.py --output results.json
+    python benchmark.py --baseline results.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+from terrain import MATERIALS
+from tilegrid import TileGrid
+from world import World
+
+TILE_SIZE = 32
+
+
+def measure(func, repeat, number=1, setup=None):
+    """Führt func repeat-mal number-fach aus, gibt Sekunden pro Aufruf zurück.
+
+    setup() läuft vor jeder Wiederholung, außerhalb der Zeitmessung.
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return {
+        "seconds": statistics.median(samples),
+        "min": min(samples),
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def walkable_positions(world, count, rng):
+    """Zufällige begehbare Positionen (für Gebäude)"""
+    positions = []
+    size = world.world_size
+    while len(positions) < count:
+        x = rng.randrange(size)
+        y = rng.randrange(size)
+        if world.is_valid_position(x, y) and (x, y) not in world.buildings:
+            positions.append((x, y))
+    return positions
+
+
+def bench_generate(results, sizes, repeat):
+    for size in sizes:
+        world = World(TILE_SIZE, world_size=size)
+        results[f"generate_world/{size}"] = measure(world.generate_world, repeat)
+
+
+def allocated(build):
+    """Bytes, die build() belegt und die nach der Rückkehr noch leben"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()  # lebt bis nach der Messung
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    return size
+
+
+def bench_tile_memory(memory, sizes):
+    """Speicher pro Tile: {(x, y): {"material", "collected"}} gegen TileGrid
+
+    Die Materialien sind zufällig mit festem Seed gezogen; beide Varianten
+    teilen sich dieselben Material-Strings, gezählt wird nur der Container.
+    """
+    for size in sizes:
+        rng = random.Random(1)
+        ids = bytearray(rng.randrange(len(MATERIALS)) for _ in range(size * size))
+
+        def tile_dicts():
+            return {(x, y): {"material": MATERIALS[ids[y * size + x]], "collected": False}
+                    for y in range(size) for x in range(size)}
+
+        def tile_grid():
+            return TileGrid(size, size, bytearray(ids))
+
+        tiles = size * size
+        for name, build in (("dict", tile_dicts), ("tilegrid", tile_grid)):
+            total = allocated(build)
+            memory[f"tiles/{size}/{name}"] = {
+                "bytes": total,
+                "bytes_per_tile": total / tiles,
+                "tiles": tiles,
+            }
+
+
+def bench_lookups(results, repeat, count=100_000):
+    rng = random.Random(1)
+    world = World(TILE_SIZE)
+    size = world.world_size
+    points = [(rng.randrange(size), rng.randrange(size)) for _ in range(count)]
+
+    def valid():
+        for x, y in points:
+            world.is_valid_position(x, y)
+
+    def collect():
+        # Mehr Punkte als Tiles: auch schon gesammelte Tiles (im Spiel der
+        # häufigste Fall) werden mitgemessen
+        for x, y in points:
+            collect_world.collect_material(x, y)
+
+    def fresh_world():
+        # Jede Wiederholung sammelt auf einer ungesammelten Welt
+        nonlocal collect_world
+        collect_world = World(TILE_SIZE)
+
+    collect_world = None
+    for name, func, setup in (("is_valid_position", valid, None),
+                              ("collect_material", collect, fresh_world)):
+        result = measure(func, repeat, setup=setup)
+        result["seconds"] /= count
+        result["min"] /= count
+        result["calls"] = count
+        results[f"lookup/{name}"] = result
+
+
+def bench_paths(results, repeat, size=2000):
+    world = World(TILE_SIZE, world_size=size)
+    center = size // 2
+    # Einmaliges Beschriften der Komponenten, getrennt von den Abfragen
+    results[f"path/{size}/components"] = measure(lambda: world.connected((center, center), (0, 0)), 1)
+    queries = {
+        "find_path": lambda: world.find_path((center, center), (center + 300, center + 200)),
+        "find_path/long": lambda: world.find_path((center, center), (size - 100, size - 100)),
+        "reachable_tiles/100": lambda: world.reachable_tiles(center, center, 100),
+        "find_nearest_material": lambda: world.find_nearest_material(center, center, "Magnesium", 200),
+    }
+    for name, func in queries.items():
+        results[f"path/{size}/{name}"] = measure(func, repeat)
+
+
+def bench_material_index(results, repeat, size=2000):
+    world = World(TILE_SIZE, world_size=size)
+    index = world.material_index
+    center = size // 2
+    queries = {
+        "nearest": lambda: index.nearest("Magnesium", center, center),
+        "within_radius/100": lambda: index.within_radius("Eisen", center, center, 100),
+        "count_in_rect/world": lambda: index.count_in_rect("Kohle", 0, 0, size, size),
+    }
+    for name, func in queries.items():
+        results[f"material_index/{size}/{name}"] = measure(func, repeat, number=10)
+
+
+def bench_minimap(results, repeat, size=2000):
+    from minimap import MiniMap
+
+    world = World(TILE_SIZE, world_size=size)
+    results[f"minimap/{size}/build"] = measure(lambda: MiniMap(world), 1)
+    minimap = MiniMap(world)
+    rng = random.Random(6)
+    positions = [(rng.randrange(size), rng.randrange(size)) for _ in range(100)]
+    screen = pygame.Surface((800, 600))
+
+    def update():
+        # Wie collect_material: ein Tile, alle Stufen darüber
+        for x, y in positions:
+            minimap.update(x, y, x, y)
+
+    result = measure(update, repeat)
+    result["seconds"] /= len(positions)
+    result["min"] /= len(positions)
+    result["calls"] = len(positions)
+    results[f"minimap/{size}/update_tile"] = result
+    results[f"minimap/{size}/overview"] = measure(
+        lambda: minimap.draw_overview(screen, (600, 400, 200, 200)), repeat, number=100)
+    results[f"minimap/{size}/view"] = measure(
+        lambda: minimap.draw_view(screen, screen.get_rect(), size // 2, size // 2, 2), repeat, number=100)
+
+
+def bench_light(results, building_counts, repeat):
+    rng = random.Random(2)
+    for count in building_counts:
+        world = World(TILE_SIZE)
+        for x, y in walkable_positions(world, count, rng):
+            world.place_building(x, y, "Lagerfeuer")
+
+        cells = [(x, y) for x in range(80, 120) for y in range(80, 120)]
+
+        def query():
+            for x, y in cells:
+                world.get_light_level(x, y)
+
+        result = measure(query, repeat, number=50)
+        result["seconds"] /= len(cells)
+        result["min"] /= len(cells)
+        result["calls"] = len(cells) * 50
+        results[f"get_light_level/{count}_buildings"] = result
+
+
+def bench_frames(results, building_counts, repeat, frames=30):
+    # Erst hier importieren: main initialisiert beim Erzeugen das Display
+    from main import Game
+
+    rng = random.Random(3)
+    game = Game(save_path=None)
+    world = game.world
+    size = world.world_size * game.TILE_SIZE
+    cameras = {
+        "center": (size // 2 - game.SCREEN_WIDTH // 2, size // 2 - game.SCREEN_HEIGHT // 2),
+        "corner": (-game.SCREEN_WIDTH // 2, -game.SCREEN_HEIGHT // 2),
+        "edge": (size - game.SCREEN_WIDTH // 2, size // 3),
+    }
+
+    placed = 0
+    for count in sorted(building_counts):
+        for x, y in walkable_positions(world, count - placed, rng):
+            world.place_building(x, y, "Lagerfeuer")
+        placed = count
+
+        for name, (camera_x, camera_y) in cameras.items():
+            def frame():
+                game.camera_x = camera_x
+                game.camera_y = camera_y
+                game.draw()
+
+            # Erster Frame füllt die Caches und wird gesondert gemessen
+            results[f"game_draw/{name}/{count}_buildings/first"] = measure(frame, 1)
+            results[f"game_draw/{name}/{count}_buildings"] = measure(frame, repeat, frames)
+
+
+def bench_dirty_frames(results, repeat, frames=30):
+    from main import Game
+
+    game = Game(save_path=None, dirty_rects=True)
+    game.update()
+    game.draw()
+
+    def idle():
+        game.draw()
+
+    step = [1]
+
+    def scroll():
+        # Hin und her laufen: Kamera scrollt jeden Frame um ein Tile
+        step[0] = -step[0]
+        game.player.move(step[0], 0, game.world)
+        game.update()
+        game.draw()
+
+    results["game_draw_dirty/idle"] = measure(idle, repeat, frames)
+    results["game_draw_dirty/scroll"] = measure(scroll, repeat, frames)
+
+
+def bench_simulation(results, repeat, count=100_000):
+    from main import Game
+    from simulate import random_keys, simulate
+
+    keys = list(random_keys(count))
+    result = measure(lambda: simulate(Game(save_path=None, headless=True), keys), repeat)
+    result["seconds"] /= count
+    result["min"] /= count
+    result["calls"] = count
+    results["simulate/tick"] = result
+
+
+def bench_crafting(results, repeat, recipes=2000, materials=40, changes=10_000):
+    from crafting import Affordability, Inventory, RecipeRegistry
+
+    rng = random.Random(5)
+    names = [f"Material{i}" for i in range(materials)]
+    registry = RecipeRegistry.from_data({
+        "buildings": {"Gebäude": {}},
+        "recipes": [{"name": f"Rezept{i}", "building": "Gebäude",
+                     "cost": {m: rng.randint(1, 9) for m in rng.sample(names, rng.randint(1, 4))}}
+                    for i in range(recipes)],
+    })
+    inventory = Inventory({name: 0 for name in names})
+    affordability = Affordability(registry, inventory)
+    steps = [(rng.choice(names), rng.randint(-4, 4)) for _ in range(changes)]
+    selected = registry.recipes[0]
+
+    def churn():
+        # Inventaränderung plus Abfrage fürs Baumenü, wie nach jedem Abbauen
+        for material, delta in steps:
+            inventory[material] = max(0, inventory[material] + delta)
+            affordability.can_afford(selected)
+
+    result = measure(churn, repeat)
+    result["seconds"] /= changes
+    result["min"] /= changes
+    result["calls"] = changes
+    results[f"crafting/change/{recipes}_recipes"] = result
+
+
+def bench_journal(results, repeat, records=50_000):
+    import shutil
+    import tempfile
+
+    import journal
+    from player import Player
+
+    path = tempfile.mkdtemp()
+    try:
+        world = World(TILE_SIZE)
+        player = Player(world.spawn_x, world.spawn_y, TILE_SIZE, registry=world.registry)
+        log = journal.Journal(path, world)
+        rng = random.Random(7)
+        positions = [(rng.randrange(200), rng.randrange(200)) for _ in range(records)]
+
+        def append():
+            for x, y in positions:
+                log.collected(x, y)
+
+        result = measure(append, 1)
+        result["seconds"] /= records
+        result["min"] /= records
+        result["calls"] = records
+        results["journal/append"] = result
+        log.close()
+
+        # Abspielen eines Journals dieser Länge beim Start
+        results[f"journal/replay/{records}_records"] = measure(
+            lambda: journal.replay(path, World(TILE_SIZE), player), repeat)
+    finally:
+        shutil.rmtree(path)
+
+
+def bench_server(results, repeat, agents=1000, ticks=20):
+    from server import WorldServer, random_commands
+
+    rng = random.Random(4)
+    world = World(TILE_SIZE)
+    server = WorldServer(world)
+    for x, y in walkable_positions(world, agents, rng):
+        server.add_agent(x, y)
+
+    def tick():
+        random_commands(server, rng)
+        server.tick()
+
+    results[f"server/tick/{agents}_agents"] = measure(tick, repeat, ticks)
+
+
+# Kaltstart: jeweils ein frischer Interpreter
+COLD_START = {
+    "interpreter": "pass",
+    # Reine Spiellogik, muss ohne pygame auskommen
+    "logic_import": ("import sys, journal, savegame, server, world\n"
+                     "assert 'pygame' not in sys.modules"),
+    "logic_world": ("import sys, world\n"
+                    "world.World(32).find_nearest_material(100, 100, 'Eisen')\n"
+                    "assert 'pygame' not in sys.modules"),
+    "main_first_frame": ("from main import Game\n"
+                         "game = Game(save_path=None)\n"
+                         "game.update()\n"
+                         "game.draw()"),
+}
+
+
+def bench_cold_start(results, repeat):
+    import subprocess
+
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    for name, code in COLD_START.items():
+        results[f"cold_start/{name}"] = measure(
+            lambda: subprocess.run([sys.executable, "-c", code], env=env, cwd=cwd, check=True), repeat)
+
+
+def run(args):
+    pygame.init()
+    results = {}
+    bench_cold_start(results, args.repeat)
+    bench_generate(results, args.sizes, args.repeat)
+    bench_lookups(results, args.repeat)
+    bench_paths(results, args.repeat)
+    bench_material_index(results, args.repeat)
+    bench_minimap(results, args.repeat)
+    bench_light(results, args.buildings, args.repeat)
+    bench_frames(results, args.buildings, args.repeat)
+    bench_dirty_frames(results, args.repeat)
+    bench_simulation(results, args.repeat)
+    bench_crafting(results, args.repeat)
+    bench_journal(results, args.repeat)
+    bench_server(results, args.repeat)
+    memory = {}
+    bench_tile_memory(memory, args.memory_sizes)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+        "memory": memory,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Gibt die Liste der Regressionen (Name, alt, neu) zurück.
+
+    Verglichen wird der schnellste Lauf, der ist am wenigsten verrauscht.
+    """
+    regressions = []
+    for name, old in sorted(baseline["results"].items()):
+        new = current["results"].get(name)
+        if new is None:
+            continue
+        ratio = new["min"] / old["min"] if old["min"] > 0 else 1.0
+        status = "REGRESSION" if ratio > 1.0 + threshold else "ok"
+        print(f"{status:>10}  {name:<45} {old['min'] * 1e6:12.3f} us -> "
+              f"{new['min'] * 1e6:12.3f} us  ({ratio:.2f}x)")
+        if status != "ok":
+            regressions.append((name, old["min"], new["min"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="benchmark_results.json",
+                        help="Ergebnisdatei (JSON)")
+    parser.add_argument("--baseline", help="Gespeicherte Ergebnisse zum Vergleich")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Erlaubte Verlangsamung, 0.25 = 25%%")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 200, 500, 1000],
+                        help="Weltgrößen für generate_world")
+    parser.add_argument("--buildings", type=int, nargs="+", default=[0, 100, 1000],
+                        help="Gebäudeanzahlen für Licht- und Frame-Benchmarks")
+    parser.add_argument("--memory-sizes", type=int, nargs="+", default=[200, 500],
+                        help="Weltgrößen für den Speicher pro Tile")
+    args = parser.parse_args(argv)
+
+    current = run(args)
+    with open(args.output, "w") as f:
+        json.dump(current, f, indent=2, sort_keys=True)
+    print(f"Ergebnisse geschrieben: {args.output}")
+    for name, entry in sorted(current["memory"].items()):
+        print(f"{'memory':>10}  {name:<45} {entry['bytes_per_tile']:12.3f} B/Tile")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} Regression(en) über {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
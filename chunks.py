@@ -0,0 +1,175 @@
+from collections import OrderedDict
+
+# Kantenlänge eines Chunks in Tiles
+CHUNK_SIZE = 64
+
+# Standard-Speicherbudget für geladene Chunks (Bytes)
+DEFAULT_MEMORY_BUDGET = 32 * 1024 * 1024
+
+
+class Chunk:
+    """Ein quadratischer Ausschnitt der Welt mit eigenem TileGrid"""
+
+    __slots__ = ("cx", "cy", "grid", "modified", "dirty", "pinned", "walkable",
+                 "resources", "size")
+
+    def __init__(self, cx, cy, grid, pinned=False):
+        self.cx = cx
+        self.cy = cy
+        self.grid = grid
+        # Verändert (gesammelte Tiles, Gebäude) -> nicht einfach verwerfen
+        self.modified = False
+        # Seit dem letzten Speichern verändert
+        self.dirty = False
+        # Nicht regenerierbar -> nie verdrängen
+        self.pinned = pinned
+        # Begehbarkeits-Bitmap (bytearray, 1 = begehbar), erst bei Bedarf
+        # aufgebaut, siehe World.chunk_walkable
+        self.walkable = None
+        # Rohstoff-Zählung (materialindex.ChunkResources), ebenfalls bei Bedarf
+        self.resources = None
+        # Im Speicherbudget verbuchte Bytes, siehe ChunkCache.account
+        self.size = 0
+
+    def footprint(self):
+        """Speicherbedarf in Bytes: Raster plus aufgebaute Hilfsdaten"""
+        size = self.grid.nbytes
+        if self.walkable is not None:
+            size += len(self.walkable)
+        if self.resources is not None:
+            size += self.resources.nbytes
+        return size
+
+    def mark_modified(self):
+        self.modified = True
+        self.dirty = True
+
+
+class ChunkCache:
+    """LRU-Cache für Chunks mit Speicherbudget.
+
+    generate(cx, cy) liefert das TileGrid eines Chunks. Unveränderte Chunks
+    werden bei Bedarf einfach verworfen und später neu generiert (pnoise2 ist
+    deterministisch). Von veränderten Chunks wird beim Verdrängen nur die
+    Gesammelt-Bitmaske behalten, die Materialien werden neu generiert.
+    Ins Budget zählt der ganze Chunk (Chunk.footprint), auch die bei Bedarf
+    aufgebauten Hilfsdaten.
+    """
+
+    def __init__(self, chunk_size, generate, memory_budget=DEFAULT_MEMORY_BUDGET,
+                 on_evict=None, on_load=None):
+        self.chunk_size = chunk_size
+        self.generate = generate
+        self.memory_budget = memory_budget
+        # on_evict(chunk) wird vor dem Verwerfen eines Chunks aufgerufen
+        self.on_evict = on_evict
+        # on_load(chunk) wird nach dem Laden oder Generieren eines Chunks aufgerufen
+        self.on_load = on_load
+        self.resident = OrderedDict()
+        self.resident_bytes = 0
+        # Gesammelt-Bitmasken verdrängter, veränderter Chunks
+        self.evicted_bits = {}
+        # Verdrängte Chunks, die seit dem letzten Speichern verändert wurden
+        self.evicted_dirty = set()
+        self._last_key = None
+        self._last_chunk = None
+
+    def __contains__(self, key):
+        return key in self.resident
+
+    def __iter__(self):
+        return iter(self.resident.values())
+
+    def __len__(self):
+        return len(self.resident)
+
+    def get(self, cx, cy):
+        """Gibt den Chunk (cx, cy) zurück und generiert ihn falls nötig"""
+        key = (cx, cy)
+        if key == self._last_key:
+            return self._last_chunk
+
+        chunk = self.resident.get(key)
+        if chunk is None:
+            chunk = self._load(cx, cy)
+        else:
+            self.resident.move_to_end(key)
+
+        self._last_key = key
+        self._last_chunk = chunk
+        return chunk
+
+    def add(self, chunk):
+        """Fügt einen fertigen Chunk hinzu (z.B. aus der vollständigen Generierung)"""
+        key = (chunk.cx, chunk.cy)
+        old = self.resident.pop(key, None)
+        if old is not None:
+            self.resident_bytes -= old.size
+        self.resident[key] = chunk
+        chunk.size = chunk.footprint()
+        self.resident_bytes += chunk.size
+        if key == self._last_key:
+            self._last_chunk = chunk
+        self._evict()
+
+    def account(self, chunk):
+        """Verbucht den Chunk neu, nachdem Hilfsdaten auf- oder abgebaut wurden"""
+        if self.resident.get((chunk.cx, chunk.cy)) is not chunk:
+            return
+        size = chunk.footprint()
+        self.resident_bytes += size - chunk.size
+        chunk.size = size
+        self._evict()
+
+    def dirty_keys(self):
+        """Schlüssel aller Chunks, die seit dem letzten Speichern verändert wurden"""
+        keys = {key for key, chunk in self.resident.items() if chunk.dirty}
+        return keys | self.evicted_dirty
+
+    def install(self, cx, cy, grid):
+        """Übernimmt ein anderswo (z.B. im Hintergrund) erzeugtes TileGrid.
+
+        Ist der Chunk inzwischen schon geladen, wird grid verworfen.
+        """
+        if (cx, cy) in self.resident:
+            return self.resident[(cx, cy)]
+        return self._load(cx, cy, grid)
+
+    def _load(self, cx, cy, grid=None):
+        key = (cx, cy)
+        chunk = Chunk(cx, cy, grid if grid is not None else self.generate(cx, cy))
+        bits = self.evicted_bits.pop(key, None)
+        if bits is not None:
+            chunk.grid.collected[:] = bits
+            chunk.modified = True
+        if key in self.evicted_dirty:
+            self.evicted_dirty.discard(key)
+            chunk.dirty = True
+        self.add(chunk)
+        if self.on_load is not None:
+            self.on_load(chunk)
+        return chunk
+
+    def _evict(self):
+        if self.resident_bytes <= self.memory_budget:
+            return
+
+        newest = next(reversed(self.resident))
+        for key in list(self.resident):
+            if self.resident_bytes <= self.memory_budget:
+                break
+            chunk = self.resident[key]
+            # Den gerade benutzten Chunk nie verdrängen
+            if chunk.pinned or key == newest:
+                continue
+            if chunk.modified:
+                self.evicted_bits[key] = bytes(chunk.grid.collected)
+            if chunk.dirty:
+                self.evicted_dirty.add(key)
+            if self.on_evict is not None:
+                self.on_evict(chunk)
+            del self.resident[key]
+            self.resident_bytes -= chunk.size
+            if key == self._last_key:
+                self._last_key = None
+                self._last_chunk = None
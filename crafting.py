@@ -0,0 +1,195 @@
+"""Rezepte, Inventar und Bau-Möglichkeiten.
+
+Gebäude und Rezepte stehen in recipes.json:
+
+    {
+      "buildings": {"Lagerfeuer": {"light_range": 4}},
+      "recipes": [
+        {"name": "Lagerfeuer", "cost": {"Stein": 4, "Kohle": 4}, "building": "Lagerfeuer"}
+      ]
+    }
+
+Ein Rezept stellt ein Gebäude ("building") und/oder Materialien
+("output") her. Das Inventar meldet jede Änderung; Affordability zählt
+daraus pro Rezept, wie viele Kosten noch nicht gedeckt sind, und weiß
+dadurch ohne Schleife über alle Rezepte, was gerade baubar ist.
+"""
+import bisect
+import json
+import os
+from collections.abc import MutableMapping
+
+DEFAULT_RECIPES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recipes.json")
+
+
+class Recipe:
+    __slots__ = ("index", "name", "cost", "building", "output")
+
+    def __init__(self, index, name, cost, building=None, output=None):
+        self.index = index
+        self.name = name
+        # Material -> Anzahl
+        self.cost = cost
+        # Gebäudetyp, der auf dem Feld des Spielers entsteht
+        self.building = building
+        # Material -> Anzahl, die ins Inventar kommt
+        self.output = output or {}
+
+    def __repr__(self):
+        return f"Recipe({self.name!r})"
+
+
+class RecipeRegistry:
+    """Alle Gebäude und Rezepte, nach Name und nach benötigtem Material"""
+
+    def __init__(self, buildings, recipes):
+        # Gebäudetyp -> Eigenschaften (light_range, color)
+        self.buildings = buildings
+        self.recipes = recipes
+        self.by_name = {recipe.name: recipe for recipe in recipes}
+        # Material -> [(Rezept-Index, Anzahl)] für alle Rezepte, die es kosten
+        self.uses = {}
+        for recipe in recipes:
+            for material, amount in recipe.cost.items():
+                self.uses.setdefault(material, []).append((recipe.index, amount))
+
+    @classmethod
+    def from_data(cls, data):
+        buildings = {}
+        for name, properties in data.get("buildings", {}).items():
+            buildings[name] = {
+                "light_range": int(properties.get("light_range", 0)),
+                "color": tuple(properties["color"]) if "color" in properties else None,
+            }
+        recipes = []
+        for entry in data.get("recipes", []):
+            building = entry.get("building")
+            if building is not None and building not in buildings:
+                raise ValueError(f"Rezept {entry['name']!r}: unbekanntes Gebäude {building!r}")
+            cost = {material: int(amount) for material, amount in entry["cost"].items()}
+            if any(amount <= 0 for amount in cost.values()):
+                raise ValueError(f"Rezept {entry['name']!r}: Kosten müssen positiv sein")
+            output = {material: int(amount) for material, amount in entry.get("output", {}).items()}
+            recipes.append(Recipe(len(recipes), entry["name"], cost, building, output))
+        return cls(buildings, recipes)
+
+    @classmethod
+    def load(cls, path=DEFAULT_RECIPES):
+        with open(path, encoding="utf-8") as f:
+            return cls.from_data(json.load(f))
+
+    def light_range(self, building_type):
+        building = self.buildings.get(building_type)
+        return building["light_range"] if building is not None else 0
+
+    def color(self, building_type):
+        building = self.buildings.get(building_type)
+        return building["color"] if building is not None else None
+
+
+_default_registry = None
+
+
+def default_registry():
+    """Die Rezepte aus recipes.json (einmal geladen)"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = RecipeRegistry.load()
+    return _default_registry
+
+
+class Inventory(MutableMapping):
+    """Material -> Anzahl; meldet Änderungen an listeners(material, alt, neu)"""
+
+    def __init__(self, items=None):
+        self._items = {}
+        self.listeners = []
+        if items:
+            self.update(items)
+
+    def __getitem__(self, material):
+        return self._items[material]
+
+    def __setitem__(self, material, count):
+        old = self._items.get(material, 0)
+        self._items[material] = count
+        if count != old:
+            for callback in self.listeners:
+                callback(material, old, count)
+
+    def __delitem__(self, material):
+        old = self._items.pop(material)
+        if old:
+            for callback in self.listeners:
+                callback(material, old, 0)
+
+    def __contains__(self, material):
+        return material in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, material, default=None):
+        return self._items.get(material, default)
+
+    def __repr__(self):
+        return repr(self._items)
+
+
+class Affordability:
+    """Welche Rezepte sind mit dem Inventar gerade bezahlbar?
+
+    missing[i] ist die Zahl der Kosten-Einträge von Rezept i, die das
+    Inventar nicht deckt. Eine Inventaränderung betrifft nur die Rezepte,
+    die dieses Material kosten; can_afford und affordable_recipes sind O(1).
+    """
+
+    def __init__(self, registry, inventory):
+        self.registry = registry
+        self.inventory = inventory
+        self.missing = [0] * len(registry.recipes)
+        # Indizes der bezahlbaren Rezepte, aufsteigend, und die Rezepte dazu
+        # in derselben Reihenfolge (beim Ändern einsortiert, nie beim Lesen)
+        self.affordable = []
+        self._affordable_recipes = []
+        for recipe in registry.recipes:
+            self.missing[recipe.index] = sum(
+                1 for material, amount in recipe.cost.items()
+                if inventory.get(material, 0) < amount)
+            if self.missing[recipe.index] == 0:
+                self.affordable.append(recipe.index)
+                self._affordable_recipes.append(recipe)
+        inventory.listeners.append(self._changed)
+
+    def can_afford(self, recipe):
+        return self.missing[recipe.index] == 0
+
+    def affordable_recipes(self):
+        """Bezahlbare Rezepte in Registry-Reihenfolge (nicht verändern)"""
+        return self._affordable_recipes
+
+    def _changed(self, material, old, new):
+        uses = self.registry.uses.get(material)
+        if uses is None:
+            return
+        missing = self.missing
+        for index, amount in uses:
+            was = old >= amount
+            now = new >= amount
+            if was == now:
+                continue
+            if now:
+                missing[index] -= 1
+                if missing[index] == 0:
+                    position = bisect.bisect_left(self.affordable, index)
+                    self.affordable.insert(position, index)
+                    self._affordable_recipes.insert(position, self.registry.recipes[index])
+            else:
+                if missing[index] == 0:
+                    position = bisect.bisect_left(self.affordable, index)
+                    del self.affordable[position]
+                    del self._affordable_recipes[position]
+                missing[index] += 1
@@ -0,0 +1,72 @@
+"""Beschädigte Bildschirmbereiche für das Zeichnen mit Dirty-Rects.
+
+Statt jeden Frame den ganzen Bildschirm neu aufzubauen, sammelt Game die
+Bereiche, die sich seit dem letzten Frame geändert haben (Spieler,
+gesammelte Tiles, Gebäude, HUD, Kamera-Scroll), zeichnet nur diese neu und
+überträgt sie mit pygame.display.update(rects).
+"""
+import pygame
+
+# Ab diesem Anteil beschädigter Fläche lohnt sich ein kompletter Neuaufbau
+FULL_REDRAW_RATIO = 0.6
+
+
+class DamageTracker:
+    """Sammelt beschädigte Rechtecke in Bildschirmkoordinaten"""
+
+    def __init__(self, width, height, full_redraw_ratio=FULL_REDRAW_RATIO):
+        self.screen_rect = pygame.Rect(0, 0, width, height)
+        self.full_redraw_ratio = full_redraw_ratio
+        self.rects = []
+        # Erster Frame: alles zeichnen
+        self.full = True
+
+    def add(self, rect):
+        if rect is None or self.full:
+            return
+        rect = self.screen_rect.clip(rect)
+        if rect.width and rect.height:
+            self.rects.append(rect)
+
+    def add_all(self, rects):
+        for rect in rects:
+            self.add(rect)
+
+    def invalidate(self):
+        """Der nächste Frame wird komplett neu gezeichnet"""
+        self.full = True
+        self.rects = []
+
+    def __bool__(self):
+        return self.full or bool(self.rects)
+
+    def take(self):
+        """Gibt die zusammengefassten Rechtecke zurück und leert die Liste.
+
+        Überlappende Rechtecke werden vereinigt; ist danach zu viel Fläche
+        beschädigt, wird der ganze Bildschirm zurückgegeben.
+        """
+        if self.full:
+            rects = [self.screen_rect.copy()]
+        else:
+            rects = merge_rects(self.rects)
+            area = sum(rect.width * rect.height for rect in rects)
+            screen_area = self.screen_rect.width * self.screen_rect.height
+            if area >= screen_area * self.full_redraw_ratio:
+                rects = [self.screen_rect.copy()]
+        self.rects = []
+        self.full = False
+        return rects
+
+
+def merge_rects(rects):
+    """Vereinigt überlappende Rechtecke, bis keine zwei sich mehr überlappen"""
+    merged = []
+    for rect in rects:
+        rect = rect.copy()
+        index = rect.collidelist(merged)
+        while index != -1:
+            rect.union_ip(merged.pop(index))
+            index = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
@@ -0,0 +1,92 @@
+"""Zwischengespeicherte Text-Surfaces und HUD-Ebenen.
+
+font.render gehört zu den teuersten Aufrufen pro Frame, dabei ändern sich
+Inventar, Position und Baumenü nur selten. TextCache rendert jeden Text
+(pro Farbe) einmal; HudLayer merkt sich die fertig gerenderten Surfaces
+samt Position und wird nur neu zusammengesetzt, wenn sich ihr Zustand
+ändert.
+"""
+from collections import OrderedDict
+
+import pygame
+
+# Maximale Anzahl gespeicherter Text-Surfaces
+DEFAULT_TEXT_CACHE_SIZE = 256
+
+
+class TextCache:
+    """Gerenderte Texte einer Schrift, Schlüssel (text, color), LRU"""
+
+    def __init__(self, font, max_entries=DEFAULT_TEXT_CACHE_SIZE):
+        self.font = font
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.renders = 0
+
+    def render(self, text, color):
+        key = (text, color)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            return surface
+
+        surface = self.font.render(text, True, color)
+        self.renders += 1
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+class HudLayer:
+    """Vorgerenderte Bestandteile eines HUD-Bereichs.
+
+    compose(state) ruft build(layer) nur auf, wenn sich state seit dem
+    letzten Aufruf geändert hat; build legt mit blit() und rect() fest, was
+    gezeichnet wird. draw() bringt die gespeicherten Teile auf den Schirm,
+    ohne etwas neu zu rendern.
+    """
+
+    def __init__(self, build):
+        self.build = build
+        self.state = None
+        self.items = []
+        self.rects = []
+        self.version = 0
+
+    def compose(self, state):
+        """Setzt die Ebene neu zusammen; True, wenn sie sich geändert hat"""
+        if state == self.state and self.version:
+            return False
+        self.state = state
+        self.items = []
+        self.rects = []
+        self.build(self)
+        self.version += 1
+        return True
+
+    def blit(self, surface, pos):
+        self.items.append((surface, pos))
+        self.rects.append(surface.get_rect(topleft=pos))
+
+    def rect(self, color, rect, width=0):
+        self.items.append((color, pygame.Rect(rect), width))
+        self.rects.append(pygame.Rect(rect))
+
+    def bounds(self):
+        """Umschließendes Rechteck aller Bestandteile (oder None)"""
+        if not self.rects:
+            return None
+        return self.rects[0].unionall(self.rects[1:])
+
+    def draw(self, screen):
+        blit = screen.blit
+        for item in self.items:
+            if len(item) == 2:
+                blit(*item)
+            else:
+                color, rect, width = item
+                pygame.draw.rect(screen, color, rect, width)
@@ -0,0 +1,333 @@
+"""Journal der Änderungen seit dem letzten Spielstand (Absturz-Sicherung).
+
+Gesammelte Tiles, Gebäude, Inventar und Spielerposition werden als kleine
+Binär-Einträge an world.journal im Spielstand-Verzeichnis angehängt. Der
+Hauptthread schreibt nur in einen Puffer, ein Hintergrund-Thread hängt ihn
+alle flush_interval Sekunden an die Datei (mit fsync).
+
+Jeder Eintrag setzt einen absoluten Zustand (Tile gesammelt, Gebäude an
+(x, y), Anzahl eines Materials, Position), das Abspielen ist darum
+idempotent. Ein beim Absturz halb geschriebener Eintrag am Ende fällt
+über die Prüfsumme heraus.
+
+Beim Speichern wird das Journal rotiert (world.journal -> world.journal.old)
+und nach dem fertigen Spielstand gelöscht. Gibt es world.journal.old noch
+(Absturz vor dem Ende des letzten Speicherns), werden die Einträge daran
+angehängt statt es zu ersetzen, sonst gingen sie beim nächsten Absturz
+verloren. Beim Laden werden erst
+world.journal.old, dann world.journal auf den Spielstand (oder, falls es
+noch keinen gibt, auf die frisch generierte Welt) abgespielt. So bleibt
+das Journal höchstens so lang wie die Änderungen zwischen zwei
+Speichervorgängen.
+"""
+import os
+import struct
+import threading
+import zlib
+
+MAGIC = b"SRCHJRNL"
+VERSION = 1
+
+JOURNAL_FILE = "world.journal"
+OLD_JOURNAL_FILE = "world.journal.old"
+
+# Wie savegame: Magic, Version, Weltgröße (-1 = unendlich), Chunkgröße, Seed
+_HEADER = struct.Struct("<8sHiHq")
+# Eintrags-Typ, Länge der Nutzdaten, CRC32 der Nutzdaten
+_RECORD = struct.Struct("<BHI")
+
+COLLECT = 1
+BUILD = 2
+REMOVE = 3
+ITEM = 4
+POSITION = 5
+
+_POS = struct.Struct("<ii")
+# x, y, Lichtweite (danach der Typname)
+_BUILD = struct.Struct("<iih")
+# Anzahl (danach der Materialname)
+_ITEM = struct.Struct("<I")
+
+# Ab dieser Größe soll vor dem nächsten Autosave gespeichert werden
+DEFAULT_COMPACT_BYTES = 1 << 20
+
+
+def _header(world):
+    return _HEADER.pack(MAGIC, VERSION,
+                        -1 if world.world_size is None else world.world_size,
+                        world.chunk_size, world.seed)
+
+
+def _record(kind, payload):
+    return _RECORD.pack(kind, len(payload), zlib.crc32(payload)) + payload
+
+
+class Journal:
+    """Gepuffertes Anhängen an das Journal eines Spielstand-Verzeichnisses"""
+
+    def __init__(self, path, world, flush_interval=0.25, compact_bytes=DEFAULT_COMPACT_BYTES):
+        self.path = path
+        self.file_path = os.path.join(path, JOURNAL_FILE)
+        self.old_path = os.path.join(path, OLD_JOURNAL_FILE)
+        self.flush_interval = flush_interval
+        self.compact_bytes = compact_bytes
+        self.header = _header(world)
+        # Bytes seit der letzten Rotation (für needs_compaction), auch die
+        # schon vorhandenen Einträge eines wieder geöffneten Journals
+        self.size = 0
+        self.position = None
+        # Letzter Schreibfehler des Hintergrund-Threads, close() meldet ihn
+        self.error = None
+
+        os.makedirs(path, exist_ok=True)
+        self._file = open(self.file_path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(self.header)
+        else:
+            # Halb geschriebenen Eintrag eines Absturzes abschneiden, sonst
+            # wären alle folgenden Einträge unlesbar
+            with open(self.file_path, "rb") as f:
+                data = f.read()
+            if data[:_HEADER.size] == self.header:
+                length = _valid_length(data)
+                self._file.truncate(length)
+                self.size = length - _HEADER.size
+            else:
+                self._file.truncate(0)
+                self._file.write(self.header)
+
+        # Puffer des Hauptthreads; _segments sind fertige Abschnitte, jeweils
+        # gefolgt von einer Rotation (Event, das danach gesetzt wird)
+        self._lock = threading.Lock()
+        self._pending = bytearray()
+        self._segments = []
+        self._wake = threading.Event()
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def attach(self, world, player):
+        """Schreibt ab jetzt Änderungen von world und player mit"""
+        world.journal = self
+        player.inventory.listeners.append(self._item_changed)
+        self.position = (player.grid_x, player.grid_y)
+
+    def collected(self, x, y):
+        self._append(COLLECT, _POS.pack(x, y))
+
+    def building(self, x, y, building_type, light_range):
+        self._append(BUILD, _BUILD.pack(x, y, light_range) + building_type.encode("utf-8"))
+
+    def removed(self, x, y):
+        self._append(REMOVE, _POS.pack(x, y))
+
+    def moved(self, grid_x, grid_y):
+        """Spielerposition, nur bei Änderung"""
+        if (grid_x, grid_y) != self.position:
+            self.position = (grid_x, grid_y)
+            self._append(POSITION, _POS.pack(grid_x, grid_y))
+
+    def _item_changed(self, material, old, new):
+        self._append(ITEM, _ITEM.pack(new) + material.encode("utf-8"))
+
+    def _append(self, kind, payload):
+        data = _record(kind, payload)
+        with self._lock:
+            self._pending += data
+        self.size += len(data)
+
+    def needs_compaction(self):
+        return self.size >= self.compact_bytes
+
+    def rotate(self):
+        """Beginnt ein neues Journal; alles bisher Angehängte landet in world.journal.old.
+
+        Gibt eine Rotation zurück; deren wait() kehrt zurück, sobald die
+        Rotation auf der Platte ist (erst dann darf world.journal.old
+        gelöscht werden), und wirft den Fehler, falls sie scheiterte.
+        """
+        rotation = Rotation()
+        with self._lock:
+            self._segments.append((bytes(self._pending), rotation))
+            self._pending = bytearray()
+        self.size = 0
+        self._wake.set()
+        return rotation
+
+    def close(self):
+        """Schreibt den Rest und beendet den Hintergrund-Thread.
+
+        Ist dabei oder vorher ein Schreibfehler aufgetreten, wird er hier
+        geworfen: dann fehlen dem Journal Einträge.
+        """
+        with self._lock:
+            self._closing = True
+        self._wake.set()
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            with self._lock:
+                segments, self._segments = self._segments, []
+                pending, self._pending = self._pending, bytearray()
+                closing = self._closing
+            error = None
+            try:
+                for data, rotation in segments:
+                    self._write(data)
+                    self._file.close()
+                    if os.path.isfile(self.old_path):
+                        self._append_old()
+                    else:
+                        os.replace(self.file_path, self.old_path)
+                    self._file = open(self.file_path, "wb")
+                    self._write(self.header)
+                    rotation.finish()
+                self._write(pending)
+            except Exception as exc:
+                # Nicht still weiterlaufen, aber auch nie ein Speichern hängen lassen
+                error = self.error = exc
+            finally:
+                for _, rotation in segments:
+                    rotation.finish(error)
+            if closing:
+                self._file.close()
+                return
+
+    def _append_old(self):
+        """Hängt die Einträge von world.journal an das noch gültige world.journal.old"""
+        with open(self.file_path, "rb") as f:
+            data = f.read()
+        with open(self.old_path, "r+b") as old:
+            existing = old.read()
+            if existing[:_HEADER.size] == self.header:
+                # Halb angehängten Eintrag eines Absturzes abschneiden
+                old.truncate(_valid_length(existing))
+            else:
+                old.truncate(0)
+                old.write(self.header)
+            old.seek(0, os.SEEK_END)
+            old.write(data[_HEADER.size:])
+            old.flush()
+            os.fsync(old.fileno())
+
+    def _write(self, data):
+        # Ohne neue Einträge kein fsync, sonst weckt ein ruhendes Spiel die
+        # Platte alle flush_interval Sekunden
+        if data:
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+
+class Rotation:
+    """Ergebnis von Journal.rotate()"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.error = None
+
+    def finish(self, error=None):
+        """Vom Hintergrund-Thread: Rotation fertig (oder gescheitert); nur der erste Aufruf zählt"""
+        if not self._done.is_set():
+            self.error = error
+            self._done.set()
+
+    def wait(self):
+        """Wartet auf die Rotation und wirft ihren Fehler, falls sie scheiterte"""
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+
+
+def exists(path):
+    return read_header(path) is not None
+
+
+def read_header(path):
+    """(world_size, chunk_size, seed) aus dem ältesten vorhandenen Journal oder None"""
+    for name in (OLD_JOURNAL_FILE, JOURNAL_FILE):
+        file_path = os.path.join(path, name)
+        if not os.path.isfile(file_path):
+            continue
+        with open(file_path, "rb") as f:
+            data = f.read(_HEADER.size)
+        if len(data) < _HEADER.size:
+            continue
+        magic, version, world_size, chunk_size, seed = _HEADER.unpack(data)
+        if magic != MAGIC:
+            raise ValueError("Keine Journal-Datei")
+        if version != VERSION:
+            raise ValueError(f"Unbekannte Journal-Version {version}")
+        return None if world_size < 0 else world_size, chunk_size, seed
+    return None
+
+
+def replay(path, world, player):
+    """Spielt world.journal.old und world.journal auf world und player ab.
+
+    Gibt die Zahl der angewendeten Einträge zurück. Ein unvollständiger
+    oder beschädigter Eintrag beendet das Abspielen der jeweiligen Datei.
+    """
+    applied = 0
+    header = _header(world)
+    for name in (OLD_JOURNAL_FILE, JOURNAL_FILE):
+        file_path = os.path.join(path, name)
+        if not os.path.isfile(file_path):
+            continue
+        with open(file_path, "rb") as f:
+            data = f.read()
+        if len(data) < _HEADER.size:
+            continue
+        if data[:_HEADER.size] != header:
+            raise ValueError(f"{name} gehört zu einer anderen Welt")
+        for kind, payload in _records(data):
+            _apply(kind, payload, world, player)
+            applied += 1
+    return applied
+
+
+def _records(data):
+    """(Typ, Nutzdaten) aller vollständigen Einträge nach dem Kopf"""
+    offset = _HEADER.size
+    while offset + _RECORD.size <= len(data):
+        kind, length, crc = _RECORD.unpack_from(data, offset)
+        payload = data[offset + _RECORD.size:offset + _RECORD.size + length]
+        if len(payload) != length or zlib.crc32(payload) != crc:
+            return
+        offset += _RECORD.size + length
+        yield kind, payload
+
+
+def _valid_length(data):
+    """Länge von Kopf plus allen vollständigen Einträgen"""
+    length = _HEADER.size
+    for _, payload in _records(data):
+        length += _RECORD.size + len(payload)
+    return length
+
+
+def _apply(kind, payload, world, player):
+    if kind == COLLECT:
+        world.collect_material(*_POS.unpack(payload))
+    elif kind == BUILD:
+        x, y, light_range = _BUILD.unpack_from(payload)
+        building_type = payload[_BUILD.size:].decode("utf-8")
+        world.buildings[(x, y)] = {"type": building_type, "light_range": light_range}
+        world.light.set_source(x, y, light_range)
+    elif kind == REMOVE:
+        world.remove_building(*_POS.unpack(payload))
+    elif kind == ITEM:
+        (count,) = _ITEM.unpack_from(payload)
+        player.inventory[payload[_ITEM.size:].decode("utf-8")] = count
+    elif kind == POSITION:
+        grid_x, grid_y = _POS.unpack(payload)
+        player.grid_x, player.grid_y = grid_x, grid_y
+        player.x = grid_x * player.tile_size
+        player.y = grid_y * player.tile_size
+    else:
+        raise ValueError(f"Unbekannter Journal-Eintrag {kind}")
@@ -0,0 +1,129 @@
+# Grundhelligkeit ohne Lichtquelle
+BASE_LIGHT = 0.3
+
+# Kantenlänge der Buckets, in denen Lichtquellen räumlich einsortiert werden
+BUCKET_SIZE = 16
+
+
+class LightMap:
+    """Vorberechnete Lichtlevel pro Tile.
+
+    Gespeichert werden nur beleuchtete Tiles, alle anderen haben BASE_LIGHT.
+    Beim Hinzufügen einer Lichtquelle wird nur ihr Wirkungsbereich
+    aktualisiert. Die Quellen werden in derselben Reihenfolge aufsummiert wie
+    früher die Schleife über World.buildings, damit die Werte (inklusive
+    Begrenzung auf 1.0) exakt gleich bleiben.
+    """
+
+    def __init__(self):
+        self.levels = {}
+        # (x, y) -> (light_range, Reihenfolge) für jedes Gebäude, auch ohne Licht
+        self.sources = {}
+        # Nur leuchtende Quellen, nach Bucket einsortiert
+        self._buckets = {}
+        self._next_order = 0
+        self._max_range = 0
+
+    def level(self, x, y):
+        return self.levels.get((x, y), BASE_LIGHT)
+
+    def set_source(self, x, y, light_range):
+        """Setzt oder ersetzt die Quelle bei (x, y), light_range 0 = kein Licht.
+
+        Gibt das Rechteck (x0, y0, x1, y1) der geänderten Tiles zurück oder
+        None, wenn sich nichts geändert hat.
+        """
+        pos = (x, y)
+        old = self.sources.get(pos)
+        if old is None:
+            self.sources[pos] = (light_range, self._next_order)
+            self._next_order += 1
+            if light_range <= 0:
+                return None
+            self._bucket_add(x, y, light_range)
+            self._add(x, y, light_range)
+            return (x - light_range, y - light_range, x + light_range, y + light_range)
+
+        # Ersetzte Quelle behält ihren Platz in der Reihenfolge (wie ein dict)
+        old_range, order = old
+        self.sources[pos] = (light_range, order)
+        if old_range > 0 and light_range <= 0:
+            self._bucket_remove(x, y)
+        elif old_range <= 0 and light_range > 0:
+            self._bucket_add(x, y, light_range)
+        else:
+            self._max_range = max(self._max_range, light_range)
+
+        reach = max(old_range, light_range)
+        if reach <= 0:
+            return None
+        rect = (x - reach, y - reach, x + reach, y + reach)
+        self._recompute(*rect)
+        return rect
+
+    def remove_source(self, x, y):
+        """Entfernt die Quelle bei (x, y); gibt das geänderte Rechteck oder None zurück"""
+        old = self.sources.pop((x, y), None)
+        if old is None or old[0] <= 0:
+            return None
+        light_range = old[0]
+        self._bucket_remove(x, y)
+        rect = (x - light_range, y - light_range, x + light_range, y + light_range)
+        self._recompute(*rect)
+        return rect
+
+    def _bucket_add(self, x, y, light_range):
+        self._max_range = max(self._max_range, light_range)
+        bucket = (x // BUCKET_SIZE, y // BUCKET_SIZE)
+        self._buckets.setdefault(bucket, set()).add((x, y))
+
+    def _bucket_remove(self, x, y):
+        bucket = (x // BUCKET_SIZE, y // BUCKET_SIZE)
+        members = self._buckets[bucket]
+        members.discard((x, y))
+        if not members:
+            del self._buckets[bucket]
+
+    def _add(self, x, y, light_range):
+        # Neue Quelle ist die letzte in der Reihenfolge -> einfach aufaddieren.
+        # Am Rand (distance == light_range) ist die Stärke 0, dort ändert sich nichts.
+        levels = self.levels
+        reach = light_range - 1
+        for tx in range(x - reach, x + reach + 1):
+            dx = abs(tx - x)
+            for ty in range(y - reach, y + reach + 1):
+                distance = max(dx, abs(ty - y))  # Chebyshev-Distanz
+                light_strength = 1.0 - (distance / light_range)
+                levels[(tx, ty)] = min(1.0, levels.get((tx, ty), BASE_LIGHT) + light_strength * 0.7)
+
+    def _sources_near(self, x0, y0, x1, y1):
+        """Quellen, deren Wirkungsbereich das Rechteck berühren kann, in Reihenfolge"""
+        reach = self._max_range
+        found = []
+        for bx in range((x0 - reach) // BUCKET_SIZE, (x1 + reach) // BUCKET_SIZE + 1):
+            for by in range((y0 - reach) // BUCKET_SIZE, (y1 + reach) // BUCKET_SIZE + 1):
+                for pos in self._buckets.get((bx, by), ()):
+                    light_range, order = self.sources[pos]
+                    sx, sy = pos
+                    if (sx + light_range >= x0 and sx - light_range <= x1 and
+                            sy + light_range >= y0 and sy - light_range <= y1):
+                        found.append((order, sx, sy, light_range))
+        found.sort()
+        return found
+
+    def _recompute(self, x0, y0, x1, y1):
+        """Berechnet die Lichtlevel im Rechteck (inklusive Rand) neu"""
+        nearby = self._sources_near(x0, y0, x1, y1)
+        levels = self.levels
+        for tx in range(x0, x1 + 1):
+            for ty in range(y0, y1 + 1):
+                base_light = BASE_LIGHT
+                for _, sx, sy, light_range in nearby:
+                    distance = max(abs(tx - sx), abs(ty - sy))
+                    if distance <= light_range:
+                        light_strength = 1.0 - (distance / light_range)
+                        base_light = min(1.0, base_light + light_strength * 0.7)
+                if base_light == BASE_LIGHT:
+                    levels.pop((tx, ty), None)
+                else:
+                    levels[(tx, ty)] = base_light
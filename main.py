@@ -1,17 +1,61 @@
+import argparse
+import hashlib
 import pygame
 import sys
+from damage import DamageTracker
+from hud import HudLayer, TextCache
+from minimap import MiniMap
 from player import Player
+from profiler import FrameProfiler
+from savegame import SaveGame
 from world import World
+from worldgen import ChunkPrefetcher
+
+# Spieltasten und ihre Namen (Eingabe-Skripte und Aufzeichnungen)
+KEY_NAMES = {
+    pygame.K_w: "w",
+    pygame.K_a: "a",
+    pygame.K_s: "s",
+    pygame.K_d: "d",
+    pygame.K_SPACE: "space",
+    pygame.K_b: "b",
+    pygame.K_1: "1",
+    pygame.K_2: "2",
+    pygame.K_3: "3",
+    pygame.K_4: "4",
+    pygame.K_5: "5",
+    pygame.K_6: "6",
+    pygame.K_7: "7",
+    pygame.K_8: "8",
+    pygame.K_9: "9",
+    pygame.K_RETURN: "return",
+    pygame.K_UP: "up",
+    pygame.K_DOWN: "down",
+}
+
+# Rezepte pro Seite im Baumenü (so viele, wie es Zifferntasten gibt)
+MENU_PAGE_SIZE = 9
 
 class Game:
-    def __init__(self):
-        pygame.init()
+    def __init__(self, save_path="savegame", world_size=200, profiler=None, dirty_rects=False,
+                 headless=False):
+        # headless: kein Fenster, gezeichnet wird (falls überhaupt) in eine
+        # Surface im Speicher (simulate.py, Tests ohne Display)
+        self.headless = headless
+        # Nur Display und Fonts starten; pygame.init() würde auch Audio und
+        # Joysticks initialisieren, die das Spiel nicht nutzt
+        if not headless:
+            pygame.display.init()
+        pygame.font.init()
         
         # Konstanten
         self.SCREEN_WIDTH = 800
         self.SCREEN_HEIGHT = 600
         self.TILE_SIZE = 32
         self.FPS = 60
+        self.AUTOSAVE_INTERVAL = 30000  # ms
+        # Headless (Simulation, Aufzeichnung) nie mitten im Tastenstrom speichern
+        self.autosave = not headless
         
         # Farben (8-Bit Stil)
         self.BLACK = (0, 0, 0)
@@ -19,16 +63,59 @@ class Game:
         self.GREEN = (0, 255, 0)
         
         # Display Setup
-        self.screen = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
-        pygame.display.set_caption("8-Bit Mining Adventure")
+        if headless:
+            self.screen = pygame.Surface((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
+        else:
+            self.screen = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
+            pygame.display.set_caption("8-Bit Mining Adventure")
         self.clock = pygame.time.Clock()
         
         # Font für UI
         self.font = pygame.font.Font(None, 36)
+        self.text = TextCache(self.font)
+        self.hud_layer = HudLayer(self.compose_hud)
+        self.menu_layer = HudLayer(self.compose_build_menu)
+        
+        # Spiel-Objekte (aus dem Spielstand, falls vorhanden; save_path=None
+        # spielt ohne Spielstand)
+        self.save_game = SaveGame(save_path) if save_path is not None else None
+        if self.save_game is not None and self.save_game.exists():
+            self.world, self.player = self.save_game.load(self.TILE_SIZE)
+        else:
+            self.world = World(self.TILE_SIZE, world_size=world_size)
+            self.player = Player(self.world.spawn_x, self.world.spawn_y, self.TILE_SIZE,
+                                 registry=self.world.registry)
+        # Änderungen bis zum nächsten Speichern sofort ins Journal (Absturz-Sicherung)
+        if self.save_game is not None:
+            self.save_game.open_journal(self.world, self.player)
+        self.last_save = pygame.time.get_ticks()
+        
+        # Unendliche Welt: Chunks im Hintergrund vorausberechnen
+        self.prefetcher = None
+        if self.world.world_size is None and not headless:
+            self.prefetcher = ChunkPrefetcher(self.world)
+        self.last_grid_pos = (self.player.grid_x, self.player.grid_y)
+        self.move_direction = (0, 0)
         
-        # Spiel-Objekte
-        self.world = World(self.TILE_SIZE)
-        self.player = Player(self.world.spawn_x, self.world.spawn_y, self.TILE_SIZE)
+        # Aufgezeichnete Tasten (Liste von Namen), nur wenn angefordert;
+        # run() schreibt sie beim Beenden nach record_path
+        self.recording = None
+        self.record_path = None
+        
+        # Frame-Profiler (profiler.FrameProfiler), nur wenn angefordert
+        self.profiler = profiler
+        
+        # Dirty-Rect-Modus: nur geänderte Bereiche neu zeichnen und im
+        # Leerlauf auf Eingaben warten statt mit fester Bildrate zu laufen
+        self.dirty_rects = dirty_rects
+        self.damage = DamageTracker(self.SCREEN_WIDTH, self.SCREEN_HEIGHT)
+        self.world_damage = []
+        self.drawn_camera = None
+        self.drawn_sprites = []
+        self.drawn_overlays = []
+        self.drawn_profiler = None
+        if dirty_rects:
+            self.world.add_listener(self.world_changed)
         
         # Kamera
         self.camera_x = 0
@@ -37,139 +124,255 @@ class Game:
         # Baumenü
         self.build_menu_open = False
         self.selected_build_item = 0
-        self.build_items = [
-            {"name": "Lagerfeuer", "cost": {"Stein": 4, "Kohle": 4}}
-        ]
+        # Alle Rezepte, auch die ohne Gebäude (nur "output")
+        self.build_items = self.world.registry.recipes
+        
+        # Minimap (M) und Übersicht (Z, Stufen der Mip-Pyramide); die
+        # Pyramide wird erst beim ersten Anzeigen aufgebaut
+        self.minimap = None
+        self.show_minimap = False
+        self.zoom_level = 0
+        self.drawn_view = None
         
     def update_camera(self):
         # Kamera folgt dem Spieler
         self.camera_x = self.player.x - self.SCREEN_WIDTH // 2
         self.camera_y = self.player.y - self.SCREEN_HEIGHT // 2
         
+    def get_minimap(self):
+        if self.minimap is None:
+            self.minimap = MiniMap(self.world)
+        return self.minimap
+        
+    def handle_view_key(self, key):
+        """Minimap und Zoom umschalten; True, wenn die Taste dazu gehörte"""
+        if key == pygame.K_m:
+            self.show_minimap = not self.show_minimap
+        elif key == pygame.K_z:
+            # 0 = normale Ansicht, n = Stufe n - 1 der Pyramide, bis die
+            # ganze Karte auf den Bildschirm passt
+            levels = self.get_minimap().level_for(self.SCREEN_WIDTH, self.SCREEN_HEIGHT) + 1
+            self.zoom_level = (self.zoom_level + 1) % (levels + 1)
+        else:
+            return False
+        return True
+        
+    def minimap_rect(self):
+        return pygame.Rect(self.SCREEN_WIDTH - 210, self.SCREEN_HEIGHT - 210, 200, 200)
+        
+    def draw_minimap(self, screen):
+        # Ganze Karte unten rechts, Spieler als Punkt
+        minimap = self.get_minimap()
+        rect = self.minimap_rect()
+        screen.fill(self.BLACK, rect)
+        dest, level = minimap.draw_overview(screen, rect)
+        mx, my = minimap.to_map(self.player.grid_x, self.player.grid_y, level)
+        if dest.collidepoint(dest.x + mx, dest.y + my):
+            screen.fill(self.player.color, (dest.x + mx - 1, dest.y + my - 1, 3, 3))
+        pygame.draw.rect(screen, self.WHITE, rect, 1)
+        
+    def draw_zoomed(self, screen):
+        # Ausschnitt einer Pyramidenstufe statt der Welt, Spieler in der Mitte
+        rect = screen.get_rect()
+        screen.fill(self.BLACK)
+        self.get_minimap().draw_view(screen, rect, self.player.grid_x, self.player.grid_y,
+                                     self.zoom_level - 1)
+        screen.fill(self.player.color, (rect.centerx - 1, rect.centery - 1, 3, 3))
+        
+    def view_state(self):
+        """Was Minimap und Übersicht zeigen (für den Dirty-Rect-Modus)"""
+        if not self.show_minimap and not self.zoom_level:
+            return None
+        return (self.zoom_level, self.show_minimap, self.get_minimap().version,
+                self.player.grid_x, self.player.grid_y)
+        
+    def compose_ui(self):
+        """Setzt geänderte HUD-Ebenen neu zusammen, gibt die betroffenen Bereiche zurück"""
+        damaged = []
+        inventory = tuple(self.player.inventory.items())
+        layers = (
+            (self.hud_layer, (inventory, self.player.grid_x, self.player.grid_y)),
+            (self.menu_layer, (self.build_menu_open, inventory, self.selected_build_item)),
+        )
+        for layer, state in layers:
+            old_rects = layer.rects
+            if layer.compose(state):
+                damaged.extend(old_rects)
+                damaged.extend(layer.rects)
+        return damaged
+        
     def draw_ui(self):
+        # Inventar, Position und Baumenü nur bei Änderungen neu zusammensetzen
+        self.compose_ui()
+        self.hud_layer.draw(self.screen)
+        self.menu_layer.draw(self.screen)
+            
+    def compose_hud(self, layer):
         # Inventar anzeigen
         y_offset = 10
-        inventory_text = self.font.render("Inventar:", True, self.WHITE)
-        self.screen.blit(inventory_text, (10, y_offset))
+        layer.blit(self.text.render("Inventar:", self.WHITE), (10, y_offset))
         y_offset += 30
         
         for material, count in self.player.inventory.items():
             if count > 0:
-                text = self.font.render(f"{material}: {count}", True, self.WHITE)
-                self.screen.blit(text, (10, y_offset))
+                layer.blit(self.text.render(f"{material}: {count}", self.WHITE), (10, y_offset))
                 y_offset += 25
                 
         # Position anzeigen
-        pos_text = self.font.render(f"Position: ({self.player.grid_x}, {self.player.grid_y})", True, self.WHITE)
-        self.screen.blit(pos_text, (10, self.SCREEN_HEIGHT - 30))
+        pos_text = self.text.render(f"Position: ({self.player.grid_x}, {self.player.grid_y})", self.WHITE)
+        layer.blit(pos_text, (10, self.SCREEN_HEIGHT - 30))
         
-        # Baumenü anzeigen
-        if self.build_menu_open:
-            self.draw_build_menu()
+    def compose_build_menu(self, layer):
+        if not self.build_menu_open:
+            return
             
-    def draw_build_menu(self):
-        # Hintergrund für Baumenü
+        # Hintergrund für Baumenü; eine Seite mit höchstens MENU_PAGE_SIZE
+        # Rezepten, Kosten nur für das ausgewählte
         menu_width = 300
-        menu_height = 200
+        page, pages = self.build_menu_page()
+        first = page * MENU_PAGE_SIZE
+        items = self.build_items[first:first + MENU_PAGE_SIZE]
+        selected = self.build_items[self.selected_build_item] if self.build_items else None
+        details = 0 if selected is None else 20 * (len(selected.cost) + bool(selected.output)) + 45
+        menu_height = max(200, 60 + 25 * len(items) + details + (25 if pages > 1 else 0))
         menu_x = self.SCREEN_WIDTH - menu_width - 10
         menu_y = 10
         
-        pygame.draw.rect(self.screen, (50, 50, 50), 
-                        (menu_x, menu_y, menu_width, menu_height))
-        pygame.draw.rect(self.screen, self.WHITE, 
-                        (menu_x, menu_y, menu_width, menu_height), 2)
+        layer.rect((50, 50, 50), (menu_x, menu_y, menu_width, menu_height))
+        layer.rect(self.WHITE, (menu_x, menu_y, menu_width, menu_height), 2)
         
         # Titel
-        title_text = self.font.render("Baumenü (B zum Schließen)", True, self.WHITE)
-        self.screen.blit(title_text, (menu_x + 10, menu_y + 10))
+        layer.blit(self.text.render("Baumenü (B zum Schließen)", self.WHITE), (menu_x + 10, menu_y + 10))
         
-        # Bauoptionen
+        # Bauoptionen, nummeriert wie die Zifferntasten auf dieser Seite
         y_offset = menu_y + 50
-        for i, item in enumerate(self.build_items):
+        for i, item in enumerate(items, first):
             color = self.GREEN if i == self.selected_build_item else self.WHITE
             
             # Item Name
-            item_text = self.font.render(f"{i+1}. {item['name']}", True, color)
-            self.screen.blit(item_text, (menu_x + 10, y_offset))
+            layer.blit(self.text.render(f"{i - first + 1}. {item.name}", color), (menu_x + 10, y_offset))
+            y_offset += 25
+            if i != self.selected_build_item:
+                continue
             
             # Kosten anzeigen
-            cost_y = y_offset + 25
-            can_build = True
-            for material, amount in item["cost"].items():
+            for material, amount in item.cost.items():
                 player_amount = self.player.inventory.get(material, 0)
                 cost_color = self.GREEN if player_amount >= amount else (255, 0, 0)
-                if player_amount < amount:
-                    can_build = False
-                    
-                cost_text = self.font.render(f"  {material}: {amount} ({player_amount})", True, cost_color)
-                self.screen.blit(cost_text, (menu_x + 20, cost_y))
-                cost_y += 20
+                cost_text = self.text.render(f"  {material}: {amount} ({player_amount})", cost_color)
+                layer.blit(cost_text, (menu_x + 20, y_offset))
+                y_offset += 20
             
-            # Bauanweisung
-            if i == self.selected_build_item:
-                if can_build:
-                    build_text = self.font.render("Drücke ENTER zum Bauen", True, self.GREEN)
-                else:
-                    build_text = self.font.render("Nicht genug Materialien", True, (255, 0, 0))
-                self.screen.blit(build_text, (menu_x + 10, cost_y + 10))
+            # Ertrag von Rezepten ohne Gebäude
+            if item.output:
+                output = ", ".join(f"{material} {amount}" for material, amount in item.output.items())
+                layer.blit(self.text.render(f"  Ergibt: {output}", self.WHITE), (menu_x + 20, y_offset))
+                y_offset += 20
             
-            y_offset = cost_y + 40
+            # Bauanweisung
+            if self.player.can_build(item):
+                build_text = self.text.render("Drücke ENTER zum Bauen", self.GREEN)
+            else:
+                build_text = self.text.render("Nicht genug Materialien", (255, 0, 0))
+            layer.blit(build_text, (menu_x + 10, y_offset + 10))
+            y_offset += 45
         
-    def handle_events(self):
-        for event in pygame.event.get():
+        # Weitere Seiten über die Pfeiltasten
+        if pages > 1:
+            layer.blit(self.text.render(f"Seite {page + 1}/{pages} (Pfeiltasten)", self.WHITE),
+                       (menu_x + 10, y_offset))
+        
+    def build_menu_page(self):
+        """(Seite des ausgewählten Rezepts, Anzahl Seiten) im Baumenü"""
+        pages = max(1, -(-len(self.build_items) // MENU_PAGE_SIZE))
+        return self.selected_build_item // MENU_PAGE_SIZE, pages
+        
+    def handle_events(self, first_event=None):
+        events = pygame.event.get()
+        if first_event is not None:
+            # Ereignis, auf das wait_for_input gewartet hat
+            events.insert(0, first_event)
+        for event in events:
             if event.type == pygame.QUIT:
                 return False
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                self.damage.invalidate()
             elif event.type == pygame.KEYDOWN:
+                if self.profiler is not None and self.profiler.handle_key(event.key):
+                    continue
+                if self.handle_view_key(event.key):
+                    continue
                 if event.key == pygame.K_ESCAPE:
                     return False
-                elif event.key == pygame.K_b:
-                    # Baumenü öffnen/schließen
-                    self.build_menu_open = not self.build_menu_open
-                elif self.build_menu_open:
-                    # Baumenü Navigation
-                    if event.key == pygame.K_1:
-                        self.selected_build_item = 0
-                    elif event.key == pygame.K_RETURN:
-                        self.try_build_item()
-                elif not self.build_menu_open:
-                    # Normale Steuerung nur wenn Baumenü geschlossen
-                    if event.key == pygame.K_SPACE:
-                        # Feld rechts neben der Figur abbauen
-                        self.player.mine_right(self.world)
-                    elif event.key == pygame.K_w:
-                        self.player.move(0, -1, self.world)
-                    elif event.key == pygame.K_s:
-                        self.player.move(0, 1, self.world)
-                    elif event.key == pygame.K_a:
-                        self.player.move(-1, 0, self.world)
-                    elif event.key == pygame.K_d:
-                        self.player.move(1, 0, self.world)
+                key = KEY_NAMES.get(event.key)
+                if key is not None:
+                    self.press_key(key)
         
         return True
         
+    def press_key(self, key):
+        """Verarbeitet eine Spieltaste (Name aus KEY_NAMES).
+        
+        Unabhängig von pygame-Ereignissen, damit simulate.py aufgezeichnete
+        oder geskriptete Eingaben abspielen kann.
+        """
+        if self.recording is not None:
+            self.recording.append(key)
+        if key == "b":
+            # Baumenü öffnen/schließen
+            self.build_menu_open = not self.build_menu_open
+        elif self.build_menu_open:
+            # Baumenü Navigation
+            if key.isdigit():
+                # Tasten 1-9 wählen die Rezepte der angezeigten Seite
+                index = self.build_menu_page()[0] * MENU_PAGE_SIZE + int(key) - 1
+                if index < len(self.build_items):
+                    self.selected_build_item = index
+            elif key in ("up", "down"):
+                # Pfeiltasten gehen durch alle Rezepte (und damit die Seiten)
+                step = -1 if key == "up" else 1
+                self.selected_build_item = min(max(self.selected_build_item + step, 0),
+                                               max(len(self.build_items) - 1, 0))
+            elif key == "return":
+                self.try_build_item()
+        else:
+            # Normale Steuerung nur wenn Baumenü geschlossen
+            if key == "space":
+                # Feld rechts neben der Figur abbauen
+                self.player.mine_right(self.world)
+            elif key == "w":
+                self.player.move(0, -1, self.world)
+            elif key == "s":
+                self.player.move(0, 1, self.world)
+            elif key == "a":
+                self.player.move(-1, 0, self.world)
+            elif key == "d":
+                self.player.move(1, 0, self.world)
+        
+    def state_hash(self):
+        """SHA-256 über den Spielzustand (Spieler, Inventar, Menü, Gebäude, gesammelte Tiles).
+        
+        Hängt nicht davon ab, welche Chunks gerade geladen sind; zwei Läufe
+        mit gleicher Eingabe müssen denselben Wert liefern.
+        """
+        digest = hashlib.sha256()
+        player = self.player
+        digest.update(repr((player.grid_x, player.grid_y, sorted(player.inventory.items()),
+                            self.build_menu_open, self.selected_build_item,
+                            sorted((pos, building["type"], building["light_range"])
+                                   for pos, building in self.world.buildings.items()))).encode())
+        for (cx, cy), collected in self.world.collected_state():
+            digest.update(repr((cx, cy)).encode())
+            digest.update(collected)
+        return digest.hexdigest()
+        
     def try_build_item(self):
         """Versucht das ausgewählte Item zu bauen"""
         if self.selected_build_item >= len(self.build_items):
             return
             
         item = self.build_items[self.selected_build_item]
-        
-        # Prüfen ob genug Materialien vorhanden
-        can_build = True
-        for material, amount in item["cost"].items():
-            if self.player.inventory.get(material, 0) < amount:
-                can_build = False
-                break
-        
-        if can_build:
-            # Materialien abziehen
-            for material, amount in item["cost"].items():
-                self.player.inventory[material] -= amount
-            
-            # Gebäude bauen
-            if item["name"] == "Lagerfeuer":
-                self.world.place_building(self.player.grid_x, self.player.grid_y, "Lagerfeuer")
-            
+        if self.player.build(item, self.world):
             # Baumenü schließen
             self.build_menu_open = False
         
@@ -177,42 +380,296 @@ class Game:
         # Kamera aktualisieren
         self.update_camera()
         
-    def draw(self):
-        self.screen.fill(self.BLACK)
+        # Chunk-Generierung in Laufrichtung anstoßen, fertige übernehmen
+        if self.prefetcher is not None:
+            grid_pos = (self.player.grid_x, self.player.grid_y)
+            if grid_pos != self.last_grid_pos:
+                dx = grid_pos[0] - self.last_grid_pos[0]
+                dy = grid_pos[1] - self.last_grid_pos[1]
+                self.move_direction = ((dx > 0) - (dx < 0), (dy > 0) - (dy < 0))
+                self.last_grid_pos = grid_pos
+            self.prefetcher.update(grid_pos[0], grid_pos[1], *self.move_direction)
+            self.prefetcher.poll()
         
-        # Welt zeichnen
-        self.world.draw(self.screen, self.camera_x, self.camera_y, self.SCREEN_WIDTH, self.SCREEN_HEIGHT)
+        # Regelmäßig speichern (schreibt im Hintergrund nur Änderungen),
+        # früher, wenn das Journal zu lang wird
+        if self.save_game is not None:
+            self.save_game.journal.moved(self.player.grid_x, self.player.grid_y)
+            now = pygame.time.get_ticks()
+            if self.autosave and (now - self.last_save >= self.AUTOSAVE_INTERVAL
+                                  or self.save_game.needs_compaction()):
+                self.save_game.save(self.world, self.player)
+                self.last_save = now
         
-        # Zielfläche (rechts neben dem Spieler) markieren
+    def target_rect(self):
+        """Bildschirm-Rechteck des Zielfelds (rechts neben dem Spieler) oder None"""
         target_x = self.player.grid_x + 1
         target_y = self.player.grid_y
-        if self.world.is_valid_position(target_x, target_y):
-            screen_x = target_x * self.TILE_SIZE - self.camera_x
-            screen_y = target_y * self.TILE_SIZE - self.camera_y
-            # Roten Rahmen um das Zielfeld zeichnen
-            pygame.draw.rect(self.screen, (255, 0, 0), 
-                           (screen_x, screen_y, self.TILE_SIZE, self.TILE_SIZE), 3)
+        if not self.world.is_valid_position(target_x, target_y):
+            return None
+        return pygame.Rect(target_x * self.TILE_SIZE - self.camera_x,
+                           target_y * self.TILE_SIZE - self.camera_y,
+                           self.TILE_SIZE, self.TILE_SIZE)
+        
+    def draw_target(self):
+        # Roten Rahmen um das Zielfeld zeichnen
+        rect = self.target_rect()
+        if rect is not None:
+            pygame.draw.rect(self.screen, (255, 0, 0), rect, 3)
         
-        # Spieler zeichnen
-        self.player.draw(self.screen, self.camera_x, self.camera_y)
+    def draw(self):
+        """Zeichnet einen Frame; False, wenn sich nichts geändert hat"""
+        if self.dirty_rects:
+            return self.draw_damaged()
+            
+        profiler = self.profiler
+        self.screen.fill(self.BLACK)
+        
+        if self.zoom_level:
+            # Übersicht: ein Blit aus der Mip-Pyramide statt der Tiles
+            self.draw_zoomed(self.screen)
+            if profiler is not None:
+                profiler.lap("draw_zoomed")
+        else:
+            # Welt zeichnen
+            self.world.draw(self.screen, self.camera_x, self.camera_y, self.SCREEN_WIDTH, self.SCREEN_HEIGHT)
+            if profiler is not None:
+                profiler.lap("world.draw")
+                renderer = self.world.renderer
+                profiler.count("chunk_blits", renderer.blit_count)
+                profiler.count("tiles_drawn", renderer.visible_tiles)
+                profiler.count("tiles_baked", renderer.baked_tiles)
+            
+            # Zielfläche (rechts neben dem Spieler) markieren
+            self.draw_target()
+            
+            # Spieler zeichnen
+            self.player.draw(self.screen, self.camera_x, self.camera_y)
+            if profiler is not None:
+                profiler.lap("player.draw")
+            
+            if self.show_minimap:
+                self.draw_minimap(self.screen)
+                if profiler is not None:
+                    profiler.lap("draw_minimap")
         
         # UI zeichnen
         self.draw_ui()
+        if profiler is not None:
+            profiler.lap("draw_ui")
+            profiler.draw_overlay(self.screen)
+            profiler.lap("overlay")
+        
+        if not self.headless:
+            pygame.display.flip()
+        if profiler is not None:
+            profiler.lap("display.flip")
+        return True
+        
+    def world_changed(self, x0, y0, x1, y1):
+        # Geänderte Tiles (Welt-Koordinaten) für den nächsten Frame merken
+        self.world_damage.append((x0, y0, x1, y1))
+        
+    def draw_damaged(self):
+        """Zeichnet nur die seit dem letzten Frame beschädigten Bereiche neu.
+        
+        Beschädigt werden die Bereiche von Spieler und Zielfeld, wenn sie sich
+        bewegen, geänderte Tiles, geänderte HUD-Ebenen und das Profiler-
+        Overlay. Bei einem Kamera-Scroll wird das vorhandene Bild verschoben
+        und nur der freigelegte Rand (plus alles über der Welt Gezeichnete)
+        neu gezeichnet.
+        """
+        profiler = self.profiler
+        screen = self.screen
+        damage = self.damage
+        camera_x, camera_y = self.camera_x, self.camera_y
+        tile_size = self.TILE_SIZE
         
-        pygame.display.flip()
+        damage.add_all(self.compose_ui())
+        for x0, y0, x1, y1 in self.world_damage:
+            damage.add(pygame.Rect(x0 * tile_size - camera_x, y0 * tile_size - camera_y,
+                                   (x1 - x0 + 1) * tile_size, (y1 - y0 + 1) * tile_size))
+        self.world_damage.clear()
+        
+        player_rect = pygame.Rect(self.player.x - camera_x, self.player.y - camera_y,
+                                  tile_size, tile_size)
+        sprites = [rect for rect in (player_rect, self.target_rect()) if rect is not None]
+        overlays = sprites + self.hud_layer.rects + self.menu_layer.rects
+        if self.show_minimap and not self.zoom_level:
+            overlays.append(self.minimap_rect())
+        
+        # Minimap/Übersicht: neu bei Änderungen der Karte oder Spielerposition;
+        # die Übersicht deckt den ganzen Bildschirm ab
+        view = self.view_state()
+        if view != self.drawn_view:
+            if self.zoom_level or (self.drawn_view is not None and self.drawn_view[0]):
+                damage.invalidate()
+            else:
+                damage.add(self.minimap_rect())
+            self.drawn_view = view
+        
+        scrolled = False
+        if self.drawn_camera is not None and self.drawn_camera != (camera_x, camera_y):
+            dx = self.drawn_camera[0] - camera_x
+            dy = self.drawn_camera[1] - camera_y
+            if damage.full or abs(dx) >= self.SCREEN_WIDTH or abs(dy) >= self.SCREEN_HEIGHT:
+                damage.invalidate()
+            else:
+                scrolled = True
+                screen.scroll(dx, dy)
+                # Freigelegte Ränder
+                if dx > 0:
+                    damage.add((0, 0, dx, self.SCREEN_HEIGHT))
+                elif dx < 0:
+                    damage.add((self.SCREEN_WIDTH + dx, 0, -dx, self.SCREEN_HEIGHT))
+                if dy > 0:
+                    damage.add((0, 0, self.SCREEN_WIDTH, dy))
+                elif dy < 0:
+                    damage.add((0, self.SCREEN_HEIGHT + dy, self.SCREEN_WIDTH, -dy))
+                # Alles über der Welt wurde mitverschoben
+                damage.add_all(rect.move(dx, dy) for rect in self.drawn_overlays)
+                damage.add_all(overlays)
+        self.drawn_camera = (camera_x, camera_y)
+        
+        if sprites != self.drawn_sprites:
+            damage.add_all(self.drawn_sprites)
+            damage.add_all(sprites)
+        damage.add(self.drawn_profiler)
+        
+        overlay_visible = profiler is not None and profiler.overlay_visible
+        if not damage and not overlay_visible:
+            return False
+        if profiler is not None:
+            profiler.lap("compose")
+        
+        # Jeden Bereich mit allen Ebenen neu zeichnen, auf ihn beschnitten
+        rects = damage.take()
+        for rect in rects:
+            screen.set_clip(rect)
+            if self.zoom_level:
+                self.draw_zoomed(screen)
+            else:
+                screen.fill(self.BLACK)
+                self.world.draw(screen, camera_x, camera_y, self.SCREEN_WIDTH, self.SCREEN_HEIGHT)
+                self.draw_target()
+                self.player.draw(screen, camera_x, camera_y)
+                if self.show_minimap:
+                    self.draw_minimap(screen)
+            self.hud_layer.draw(screen)
+            self.menu_layer.draw(screen)
+        screen.set_clip(None)
+        
+        self.drawn_profiler = None
+        if profiler is not None:
+            profiler.lap("redraw")
+            profiler.count("damage_rects", len(rects))
+            profiler.count("damaged_pixels", sum(rect.width * rect.height for rect in rects))
+            self.drawn_profiler = profiler.draw_overlay(screen)
+            if self.drawn_profiler is not None:
+                rects.append(self.drawn_profiler)
+            profiler.lap("overlay")
+        self.drawn_sprites = sprites
+        self.drawn_overlays = overlays
+        if self.drawn_profiler is not None:
+            self.drawn_overlays = overlays + [self.drawn_profiler]
+        
+        if self.headless:
+            pass
+        elif scrolled:
+            pygame.display.update()
+        else:
+            pygame.display.update(rects)
+        if profiler is not None:
+            profiler.lap("display.update")
+        return True
+        
+    def busy(self):
+        """Läuft noch Arbeit, deren Ergebnis gezeichnet werden muss?"""
+        return self.prefetcher is not None and bool(self.prefetcher.pending)
+        
+    def wait_for_input(self, changed):
+        """Begrenzt die Bildrate; im Leerlauf schläft die Schleife bis zur nächsten Eingabe.
+        
+        Gibt das Ereignis zurück, das die Schleife geweckt hat (oder None).
+        """
+        if changed or not self.dirty_rects or self.busy():
+            self.clock.tick(self.FPS)
+            return None
+        if self.save_game is None or not self.autosave:
+            event = pygame.event.wait()
+        else:
+            # Spätestens zum nächsten automatischen Speichern aufwachen
+            remaining = self.AUTOSAVE_INTERVAL - (pygame.time.get_ticks() - self.last_save)
+            event = pygame.event.wait(max(1, remaining))
+        # Die Wartezeit nicht als Frame-Zeit zählen
+        self.clock.tick()
+        if event.type == pygame.NOEVENT:
+            return None
+        return event
         
     def run(self):
         running = True
-        while running:
-            running = self.handle_events()
-            self.update()
-            self.draw()
-            self.clock.tick(self.FPS)
+        profiler = self.profiler
+        event = None
+        if profiler is None:
+            while running:
+                running = self.handle_events(event)
+                self.update()
+                changed = self.draw()
+                if running:
+                    event = self.wait_for_input(changed)
+        else:
+            # Gleiche Schleife mit Zeitmessung pro Phase
+            while running:
+                profiler.start_frame()
+                running = self.handle_events(event)
+                profiler.lap("handle_events")
+                self.update()
+                profiler.lap("update")
+                changed = self.draw()
+                profiler.end_frame()
+                if running:
+                    event = self.wait_for_input(changed)
+            if profiler.trace_path:
+                profiler.export_trace()
             
+        if self.prefetcher is not None:
+            self.prefetcher.shutdown()
+        if self.record_path is not None:
+            with open(self.record_path, "w") as f:
+                f.write(" ".join(self.recording) + "\n")
+        if self.save_game is not None:
+            self.save_game.save(self.world, self.player, wait=True)
+            self.save_game.close()
         pygame.quit()
         sys.exit()
 
 if __name__ == "__main__":
-    game = Game()
+    parser = argparse.ArgumentParser(description="8-Bit Mining Adventure")
+    parser.add_argument("--infinite", action="store_true",
+                        help="Unendliche Welt statt 200x200 (neuer Spielstand)")
+    parser.add_argument("--save", default="savegame",
+                        help="Verzeichnis des Spielstands")
+    parser.add_argument("--profile", action="store_true",
+                        help="Frame-Profiler aktivieren (F3 Overlay, F4 Trace)")
+    parser.add_argument("--profile-trace", default="frame_trace.json",
+                        help="Trace-Datei des Profilers")
+    parser.add_argument("--record",
+                        help="Tasten aufzeichnen (für simulate.py --script); "
+                             "spielt auf einer frischen Welt ohne Spielstand")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="Nur geänderte Bereiche zeichnen, im Leerlauf schlafen")
+    args = parser.parse_args()
+    
+    profiler = FrameProfiler(trace_path=args.profile_trace) if args.profile else None
+    # Aufzeichnungen beginnen wie simulate.py mit der frisch generierten
+    # Welt; ein geladener Spielstand oder Autosaves wären nicht nachspielbar
+    game = Game(save_path=None if args.record else args.save,
+                world_size=None if args.infinite else 200,
+                profiler=profiler, dirty_rects=args.dirty_rects)
+    if args.record:
+        game.autosave = False
+        game.recording = []
+        game.record_path = args.record
     game.run()
     
\ No newline at end of file
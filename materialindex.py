@@ -0,0 +1,221 @@
+"""Räumlicher Index der ungesammelten Rohstoff-Tiles pro Material.
+
+Jeder Chunk bekommt eine Zählung seiner ungesammelten Tiles pro Material
+und, erst wenn eine Abfrage den Chunk genauer ansehen muss, die Positionen
+dieser Tiles als Index-Array. Abfragen gehen über die Chunks: leere Chunks
+und solche, die zu weit weg liegen, werden übersprungen, vollständig
+abgedeckte Chunks werden nur gezählt.
+"""
+import numpy as np
+
+import terrain
+
+
+class ChunkResources:
+    """Zählung und (bei Bedarf) Positionen der ungesammelten Tiles eines Chunks"""
+
+    __slots__ = ("counts", "positions")
+
+    def __init__(self, counts):
+        # Ungesammelte Tiles pro Material-ID
+        self.counts = counts
+        # Material-ID -> flache Indizes (y * chunk_size + x), aufsteigend,
+        # als uint16 (siehe position_dtype)
+        self.positions = {}
+
+    @property
+    def nbytes(self):
+        return self.counts.nbytes + sum(positions.nbytes for positions in self.positions.values())
+
+
+def position_dtype(chunk_size):
+    """Kleinster Typ für flache Indizes im Chunk (uint16 bis 256 x 256)"""
+    return np.uint16 if chunk_size * chunk_size <= 1 << 16 else np.uint32
+
+
+def chunk_counts(grid):
+    """Ungesammelte Tiles pro Material-ID eines TileGrid"""
+    materials, collected = grid.as_arrays()
+    return np.bincount(materials[~collected], minlength=len(terrain.MATERIALS))
+
+
+class MaterialIndex:
+    def __init__(self, world):
+        self.world = world
+        self.chunk_size = world.chunk_size
+        self.position_dtype = position_dtype(world.chunk_size)
+
+    def build(self, chunks, material_ids):
+        """Zählungen für viele Chunks auf einmal (z.B. aus generate_world).
+
+        material_ids ist die aufgefüllte Karte (count * chunk_size)²,
+        chunks die zugehörigen Chunk-Objekte. Es wird nichts gesammelt sein.
+        """
+        size = self.chunk_size
+        count = material_ids.shape[0] // size
+        # Materialien chunkweise gruppieren: (cy, cx, Material) zählen
+        blocks = material_ids.reshape(count, size, count, size).transpose(0, 2, 1, 3)
+        block_index = np.arange(count * count, dtype=np.int64).reshape(count, count, 1, 1)
+        ids = (block_index * len(terrain.MATERIALS) + blocks).ravel()
+        counts = np.bincount(ids, minlength=count * count * len(terrain.MATERIALS))
+        counts = counts.reshape(count, count, len(terrain.MATERIALS))
+        for chunk in chunks:
+            chunk.resources = ChunkResources(counts[chunk.cy, chunk.cx].copy())
+            self.world.chunks.account(chunk)
+
+    def resources(self, chunk):
+        if chunk.resources is None:
+            chunk.resources = ChunkResources(chunk_counts(chunk.grid))
+            self.world.chunks.account(chunk)
+        return chunk.resources
+
+    def positions(self, chunk, material_id):
+        """Flache Indizes der ungesammelten Tiles des Materials im Chunk"""
+        resources = self.resources(chunk)
+        positions = resources.positions.get(material_id)
+        if positions is None:
+            materials, collected = chunk.grid.as_arrays()
+            positions = np.flatnonzero((materials == material_id) & ~collected).astype(self.position_dtype)
+            resources.positions[material_id] = positions
+            self.world.chunks.account(chunk)
+        return positions
+
+    def collected(self, chunk, x, y, material_id):
+        """Vermerkt ein gesammeltes Tile (Chunk-Koordinaten x, y)"""
+        resources = chunk.resources
+        if resources is None:
+            return
+        resources.counts[material_id] -= 1
+        positions = resources.positions.get(material_id)
+        if positions is not None:
+            resources.positions[material_id] = positions[positions != y * self.chunk_size + x]
+            self.world.chunks.account(chunk)
+
+    def _material_id(self, material):
+        material_id = terrain.MATERIAL_IDS[material]
+        if material_id == terrain.GRAS:
+            raise ValueError("Gras ist kein Rohstoff")
+        return material_id
+
+    def _chunk_range(self, x0, y0, x1, y1):
+        """Chunks, die das Tile-Rechteck [x0, x1) x [y0, y1) berühren (in der Welt)"""
+        world = self.world
+        if world.world_size is not None:
+            x0, y0 = max(x0, 0), max(y0, 0)
+            x1, y1 = min(x1, world.world_size), min(y1, world.world_size)
+        size = self.chunk_size
+        if x0 >= x1 or y0 >= y1:
+            return range(0), range(0), (x0, y0, x1, y1)
+        return (range(x0 // size, (x1 - 1) // size + 1),
+                range(y0 // size, (y1 - 1) // size + 1), (x0, y0, x1, y1))
+
+    def _tiles(self, chunk, material_id):
+        """Welt-Koordinaten (xs, ys) der ungesammelten Tiles im Chunk"""
+        # Vor dem Rechnen auf int64, uint16 liefe bei Welt-Koordinaten über
+        positions = self.positions(chunk, material_id).astype(np.int64)
+        size = self.chunk_size
+        return positions % size + chunk.cx * size, positions // size + chunk.cy * size
+
+    def count_in_rect(self, material, x0, y0, x1, y1):
+        """Anzahl ungesammelter Tiles des Materials in [x0, x1) x [y0, y1)"""
+        material_id = self._material_id(material)
+        size = self.chunk_size
+        chunk_xs, chunk_ys, (x0, y0, x1, y1) = self._chunk_range(x0, y0, x1, y1)
+        total = 0
+        for cx in chunk_xs:
+            for cy in chunk_ys:
+                chunk = self.world.chunks.get(cx, cy)
+                count = self.resources(chunk).counts[material_id]
+                if count == 0:
+                    continue
+                if x0 <= cx * size and (cx + 1) * size <= x1 and y0 <= cy * size and (cy + 1) * size <= y1:
+                    total += int(count)
+                    continue
+                xs, ys = self._tiles(chunk, material_id)
+                total += int(np.count_nonzero((xs >= x0) & (xs < x1) & (ys >= y0) & (ys < y1)))
+        return total
+
+    def within_radius(self, material, x, y, radius):
+        """Alle ungesammelten Tiles des Materials mit Abstand <= radius zu (x, y)"""
+        material_id = self._material_id(material)
+        size = self.chunk_size
+        limit = radius * radius
+        chunk_xs, chunk_ys, _ = self._chunk_range(x - radius, y - radius, x + radius + 1, y + radius + 1)
+        found = []
+        for cx in chunk_xs:
+            for cy in chunk_ys:
+                if _rect_distance2(x, y, cx * size, cy * size, size) > limit:
+                    continue
+                chunk = self.world.chunks.get(cx, cy)
+                if self.resources(chunk).counts[material_id] == 0:
+                    continue
+                xs, ys = self._tiles(chunk, material_id)
+                inside = (xs - x) ** 2 + (ys - y) ** 2 <= limit
+                found.extend(zip(xs[inside].tolist(), ys[inside].tolist()))
+        return found
+
+    def nearest(self, material, x, y, max_radius=None):
+        """Nächstes ungesammeltes Tile des Materials (euklidisch) oder None.
+
+        Die Chunks werden ringweise um (x, y) abgesucht, bis kein Ring mehr
+        näher liegen kann als der beste Fund. Bei unendlicher Welt begrenzt
+        max_radius (Standard 256 Tiles) die Suche, sonst würde sie beliebig
+        viele Chunks generieren.
+        """
+        material_id = self._material_id(material)
+        world = self.world
+        size = self.chunk_size
+        if max_radius is None:
+            max_radius = 256 if world.world_size is None else 2 * world.world_size
+        limit = max_radius * max_radius
+        pcx, pcy = x // size, y // size
+        max_ring = max_radius // size + 1
+        if world.world_size is not None:
+            last = (world.world_size - 1) // size
+            max_ring = min(max_ring, max(pcx, pcy, last - pcx, last - pcy))
+
+        best = None
+        best_d2 = limit + 1
+        for ring in range(max_ring + 1):
+            # Kein Tile dieses Rings liegt näher als (ring - 1) Chunks
+            if ring > 1 and ((ring - 1) * size) ** 2 > best_d2:
+                break
+            for cx, cy in _ring(pcx, pcy, ring):
+                if not world.in_bounds(cx * size, cy * size):
+                    continue
+                if _rect_distance2(x, y, cx * size, cy * size, size) > best_d2:
+                    continue
+                chunk = world.chunks.get(cx, cy)
+                if self.resources(chunk).counts[material_id] == 0:
+                    continue
+                xs, ys = self._tiles(chunk, material_id)
+                d2 = (xs - x) ** 2 + (ys - y) ** 2
+                i = int(np.argmin(d2))
+                # Bei gleichem Abstand die kleinere Position (y, x) nehmen
+                candidate = (int(d2[i]), int(ys[i]), int(xs[i]))
+                if best is None or candidate < best:
+                    best = candidate
+                    best_d2 = candidate[0]
+        if best is None or best[0] > limit:
+            return None
+        return best[2], best[1]
+
+
+def _ring(cx, cy, ring):
+    """Chunk-Koordinaten im Chebyshev-Abstand ring um (cx, cy)"""
+    if ring == 0:
+        yield cx, cy
+        return
+    for dx in range(-ring, ring + 1):
+        yield cx + dx, cy - ring
+        yield cx + dx, cy + ring
+    for dy in range(-ring + 1, ring):
+        yield cx - ring, cy + dy
+        yield cx + ring, cy + dy
+
+
+def _rect_distance2(x, y, rx, ry, size):
+    """Quadrat des Abstands von (x, y) zum nächsten Tile im Quadrat (rx, ry, size)"""
+    dx = max(rx - x, 0, x - (rx + size - 1))
+    dy = max(ry - y, 0, y - (ry + size - 1))
+    return dx * dx + dy * dy
@@ -0,0 +1,188 @@
+"""Minimap und Übersicht aus einer Mip-Pyramide der Welt.
+
+Stufe 0 hat ein Pixel pro Tile (Materialfarbe, gesammelt dunkler,
+Gebäude in ihrer Farbe, ohne Licht). Jede weitere Stufe mittelt 2x2
+Texel der vorherigen, bis die Karte nur noch ein Texel groß ist. Zu jeder
+Stufe gibt es eine fertige Surface, Zeichnen ist darum ein einzelner Blit,
+egal wie groß die Welt ist.
+
+Geänderte Tiles (World-Listener) und neu geladene Chunks aktualisieren nur
+die betroffenen Texel auf allen Stufen. Bei unendlicher Welt deckt die
+Pyramide ein Quadrat der Kantenlänge extent um den Ursprung ab; Chunks,
+die noch nie geladen waren, bleiben schwarz.
+"""
+import numpy as np
+import pygame
+
+import terrain
+
+# Gebäude ohne Farbe in recipes.json
+DEFAULT_BUILDING_COLOR = (255, 255, 255)
+
+
+class MiniMap:
+    def __init__(self, world, extent=1024):
+        self.world = world
+        if world.world_size is not None:
+            self.origin_x = self.origin_y = 0
+            self.width = self.height = world.world_size
+        else:
+            self.origin_x = self.origin_y = -(extent // 2)
+            self.width = self.height = extent
+
+        # Farbe pro Material-ID, ungesammelt und gesammelt
+        colors = np.array([world.colors[name] for name in terrain.MATERIALS], dtype=np.int16)
+        self.tile_colors = colors.astype(np.uint8)
+        self.collected_colors = np.maximum(colors - 30, 0).astype(np.uint8)
+
+        # Stufe k: (Höhe, Breite, 3), ein Texel = 2^k x 2^k Tiles
+        self.levels = []
+        self.surfaces = []
+        width, height = self.width, self.height
+        while True:
+            self.levels.append(np.zeros((height, width, 3), dtype=np.uint8))
+            self.surfaces.append(pygame.Surface((width, height), 0, 32))
+            if width == 1 and height == 1:
+                break
+            width, height = (width + 1) // 2, (height + 1) // 2
+
+        # Zähler, der bei jeder Änderung steigt (für das Neuzeichnen)
+        self.version = 0
+        # Aktualisierte Texel (für den Profiler/Benchmark)
+        self.updated_texels = 0
+
+        self.update(self.origin_x, self.origin_y,
+                    self.origin_x + self.width - 1, self.origin_y + self.height - 1)
+        world.add_listener(self.update)
+        world.chunk_listeners.append(self.chunk_loaded)
+
+    def chunk_loaded(self, chunk):
+        size = self.world.chunk_size
+        self.update(chunk.cx * size, chunk.cy * size,
+                    (chunk.cx + 1) * size - 1, (chunk.cy + 1) * size - 1)
+
+    def update(self, x0, y0, x1, y1):
+        """Berechnet die Texel des Tile-Rechtecks [x0, x1] x [y0, y1] (inklusive) neu"""
+        # In Texel-Koordinaten der Stufe 0 umrechnen und beschneiden
+        x0 = max(x0 - self.origin_x, 0)
+        y0 = max(y0 - self.origin_y, 0)
+        x1 = min(x1 - self.origin_x, self.width - 1)
+        y1 = min(y1 - self.origin_y, self.height - 1)
+        if x0 > x1 or y0 > y1:
+            return
+        if not self._bake_tiles(x0, y0, x1, y1):
+            return
+
+        for level in range(1, len(self.levels)):
+            x0, y0, x1, y1 = x0 >> 1, y0 >> 1, x1 >> 1, y1 >> 1
+            self.levels[level][y0:y1 + 1, x0:x1 + 1] = _downsample(
+                self.levels[level - 1], x0, y0, x1, y1)
+            self._upload(level, x0, y0, x1, y1)
+        self.version += 1
+
+    def _bake_tiles(self, x0, y0, x1, y1):
+        """Stufe 0 aus den geladenen Chunks; False, wenn keiner davon geladen ist"""
+        world = self.world
+        size = world.chunk_size
+        texels = self.levels[0]
+        ox, oy = self.origin_x, self.origin_y
+        baked = False
+        # Nur geladene Chunks lesen, für die Karte wird nichts generiert
+        for cy in range((y0 + oy) // size, (y1 + oy) // size + 1):
+            for cx in range((x0 + ox) // size, (x1 + ox) // size + 1):
+                if (cx, cy) not in world.chunks:
+                    continue
+                chunk = world.chunks.get(cx, cy)
+                materials, collected = chunk.grid.as_arrays()
+                # Überlappung in Texel-Koordinaten
+                tx0 = max(x0, cx * size - ox)
+                ty0 = max(y0, cy * size - oy)
+                tx1 = min(x1, (cx + 1) * size - 1 - ox)
+                ty1 = min(y1, (cy + 1) * size - 1 - oy)
+                lx, ly = tx0 + ox - cx * size, ty0 + oy - cy * size
+                window = (slice(ly, ly + ty1 - ty0 + 1), slice(lx, lx + tx1 - tx0 + 1))
+                texels[ty0:ty1 + 1, tx0:tx1 + 1] = np.where(
+                    collected[window][..., None],
+                    self.collected_colors[materials[window]],
+                    self.tile_colors[materials[window]])
+                baked = True
+        if not baked:
+            return False
+
+        # Gebäude darüber; bei kleinen Rechtecken nur dessen Felder nachsehen
+        buildings = world.buildings
+        registry = world.registry
+        if (x1 - x0 + 1) * (y1 - y0 + 1) < len(buildings):
+            found = ((pos, buildings.get(pos))
+                     for pos in ((x + ox, y + oy) for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)))
+        else:
+            found = buildings.items()
+        for (x, y), building in found:
+            if building is None or not (x0 <= x - ox <= x1 and y0 <= y - oy <= y1):
+                continue
+            texels[y - oy, x - ox] = registry.color(building["type"]) or DEFAULT_BUILDING_COLOR
+
+        self._upload(0, x0, y0, x1, y1)
+        return True
+
+    def _upload(self, level, x0, y0, x1, y1):
+        """Kopiert die Texel [x0, x1] x [y0, y1] der Stufe in ihre Surface"""
+        pixels = pygame.surfarray.pixels3d(self.surfaces[level])
+        pixels[x0:x1 + 1, y0:y1 + 1] = self.levels[level][y0:y1 + 1, x0:x1 + 1].transpose(1, 0, 2)
+        # Sicht freigeben, sonst bleibt die Surface gesperrt
+        del pixels
+        self.updated_texels += (x1 - x0 + 1) * (y1 - y0 + 1)
+
+    def level_for(self, width, height):
+        """Feinste Stufe, die ganz in width x height Pixel passt"""
+        for level, texels in enumerate(self.levels):
+            if texels.shape[1] <= width and texels.shape[0] <= height:
+                return level
+        return len(self.levels) - 1
+
+    def texel(self, x, y, level=0):
+        """Farbe des Texels, das Tile (x, y) auf der Stufe enthält"""
+        return tuple(int(c) for c in
+                     self.levels[level][(y - self.origin_y) >> level, (x - self.origin_x) >> level])
+
+    def to_map(self, x, y, level):
+        """Tile (x, y) -> Texel-Koordinaten der Stufe"""
+        return (x - self.origin_x) >> level, (y - self.origin_y) >> level
+
+    def draw_overview(self, screen, rect):
+        """Ganze Karte zentriert in rect (ein Blit), gibt (Ziel-Rechteck, Stufe) zurück"""
+        rect = pygame.Rect(rect)
+        level = self.level_for(rect.width, rect.height)
+        surface = self.surfaces[level]
+        dest = surface.get_rect(center=rect.center)
+        screen.blit(surface, dest)
+        return dest, level
+
+    def draw_view(self, screen, rect, x, y, level):
+        """Ausschnitt der Stufe mit Tile (x, y) in der Mitte von rect (ein Blit)"""
+        rect = pygame.Rect(rect)
+        mx, my = self.to_map(x, y, level)
+        area = pygame.Rect(mx - rect.width // 2, my - rect.height // 2, rect.width, rect.height)
+        # blit beschneidet area an der Surface, das Ziel muss mitwandern
+        clipped = area.clip(self.surfaces[level].get_rect())
+        screen.blit(self.surfaces[level],
+                    (rect.x + clipped.x - area.x, rect.y + clipped.y - area.y), clipped)
+        return rect
+
+
+def _downsample(source, x0, y0, x1, y1):
+    """Mittelwerte der 2x2-Blöcke von source für die Texel [x0, x1] x [y0, y1] der nächsten Stufe.
+
+    Am Rand ungerader Karten fehlen Blöcken Texel; gemittelt wird über die
+    vorhandenen.
+    """
+    height, width = source.shape[:2]
+    block = source[2 * y0:min(2 * y1 + 2, height), 2 * x0:min(2 * x1 + 2, width)]
+    rows, cols = 2 * (y1 - y0 + 1), 2 * (x1 - x0 + 1)
+    sums = np.zeros((rows, cols, 3), dtype=np.uint16)
+    counts = np.zeros((rows, cols), dtype=np.uint16)
+    sums[:block.shape[0], :block.shape[1]] = block
+    counts[:block.shape[0], :block.shape[1]] = 1
+    sums = sums.reshape(rows // 2, 2, cols // 2, 2, 3).sum(axis=(1, 3))
+    counts = counts.reshape(rows // 2, 2, cols // 2, 2).sum(axis=(1, 3))[..., None]
+    return ((sums + counts // 2) // counts).astype(np.uint8)
@@ -0,0 +1,371 @@
+"""Wegsuche auf der Begehbarkeits-Bitmap.
+
+Alle Funktionen arbeiten auf einem Ausschnitt der Welt als flaches
+uint8-Array (1 = begehbar) mit einem Rand aus nicht begehbaren Feldern,
+siehe World.walkable_window(). Dadurch braucht keine Suche eine
+Bereichsprüfung. Bewegt wird wie beim Spieler in vier Richtungen.
+
+Components hält dagegen die Zusammenhangskomponenten einer ganzen
+begrenzten Welt: ob ein Ziel erreichbar ist, steht damit ohne Suche fest.
+"""
+import heapq
+
+import numpy as np
+
+
+def neighbour_offsets(width):
+    """Index-Versatz der vier Nachbarn bei Zeilenbreite width"""
+    return np.array([1, -1, width, -width], dtype=np.intp)
+
+
+def find_path(walkable, width, start, goal):
+    """A* von start nach goal (flache Indizes), Manhattan-Heuristik.
+
+    Gibt die Indizes ohne start bis einschließlich goal zurück, oder None
+    ohne Weg. Siehe PathSearch.
+    """
+    return PathSearch(walkable, width, start, goal).run()
+
+
+class PathSearch:
+    """A* auf einem Ausschnitt, der wachsen kann, ohne neu zu beginnen.
+
+    Bei gleichem f wird der Knoten näher am Ziel zuerst expandiert, auf
+    offenem Gelände läuft die Suche so fast ohne Umwege. Findet run()
+    keinen Weg, aber touched_edge() ist wahr, kann grow() den Ausschnitt
+    vergrößern: die bisherigen Knoten werden umgerechnet, nur die am alten
+    Rand kommen wieder in die offene Liste.
+    """
+
+    def __init__(self, walkable, width, start, goal):
+        self.walkable = walkable
+        self.width = width
+        self.start = start
+        self.goal = goal
+        self.g_score = {}
+        self.parent = {}
+        self.heap = []
+        if walkable[start] and walkable[goal]:
+            self.g_score[start] = 0
+            self.parent[start] = -1
+            self._push(start, 0)
+
+    def _push(self, node, g):
+        width = self.width
+        h = abs(node % width - self.goal % width) + abs(node // width - self.goal // width)
+        heapq.heappush(self.heap, (g + h, h, node))
+
+    def run(self, max_expansions=None):
+        """Sucht weiter; Indizes ohne start bis einschließlich goal, oder None.
+
+        Mit max_expansions endet die Suche auch nach so vielen expandierten
+        Knoten mit None; ein weiterer run() macht dort weiter.
+        """
+        walkable = self.walkable
+        width = self.width
+        start = self.start
+        goal = self.goal
+        if not walkable[start] or not walkable[goal]:
+            return None
+        if start == goal:
+            return []
+
+        goal_x, goal_y = goal % width, goal // width
+        steps = (1, -1, width, -width)
+        g_score = self.g_score
+        parent = self.parent
+        heap = self.heap
+        push = heapq.heappush
+        pop = heapq.heappop
+
+        expansions = 0
+        while heap:
+            if max_expansions is not None:
+                if expansions >= max_expansions:
+                    return None
+                expansions += 1
+            _, _, node = pop(heap)
+            if node == goal:
+                path = []
+                while node != start:
+                    path.append(node)
+                    node = parent[node]
+                path.reverse()
+                return path
+            g = g_score[node] + 1
+            for step in steps:
+                neighbour = node + step
+                if not walkable[neighbour]:
+                    continue
+                old = g_score.get(neighbour)
+                if old is not None and old <= g:
+                    continue
+                g_score[neighbour] = g
+                parent[neighbour] = node
+                h = abs(neighbour % width - goal_x) + abs(neighbour // width - goal_y)
+                push(heap, (g + h, h, neighbour))
+        return None
+
+    def _edge(self):
+        """Erreichte Knoten direkt am Rand des Ausschnitts"""
+        width = self.width
+        height = len(self.walkable) // width
+        return [node for node in self.g_score
+                if node % width in (1, width - 2) or node // width in (1, height - 2)]
+
+    def touched_edge(self):
+        """Hat die Suche den Rand erreicht (ein größerer Ausschnitt könnte helfen)?"""
+        return bool(self._edge())
+
+    def grow(self, walkable, width, dx, dy):
+        """Setzt die Suche auf einem größeren Ausschnitt fort.
+
+        Der alte Ausschnitt liegt im neuen um (dx, dy) Tiles verschoben.
+        """
+        old_width = self.width
+        edge = set(self._edge())
+
+        def move(node):
+            return (node // old_width + dy) * width + node % old_width + dx
+
+        self.g_score = {move(node): g for node, g in self.g_score.items()}
+        self.parent = {move(node): (-1 if up < 0 else move(up)) for node, up in self.parent.items()}
+        self.start = move(self.start)
+        self.goal = move(self.goal)
+        self.walkable = walkable
+        self.width = width
+        # Die offene Liste ist leer (die Suche war erschöpft); die Knoten am
+        # alten Rand werden mit ihren neuen Nachbarn noch einmal expandiert
+        self.heap = []
+        for node in edge:
+            node = move(node)
+            self._push(node, self.g_score[node])
+
+
+class Components:
+    """Zusammenhangskomponenten der begehbaren Tiles eines Rechtecks.
+
+    labels[y, x] ist die Komponente jedes Tiles (-1 = nicht begehbar).
+    Sammeln macht Tiles nur begehbar, Komponenten wachsen darum nur
+    zusammen: add() vereinigt sie per Union-Find, ohne neu zu beschriften.
+    connected() ist damit (fast) O(1).
+    """
+
+    def __init__(self, walkable):
+        self.labels, self.next_label = label_components(walkable)
+        # Label -> Label, mit dem es vereinigt wurde
+        self.parent = {}
+        # Schrittzahlen der Breitensuche von beiden Enden (-1 = nicht
+        # erreicht), nach jeder Suche nur an den besuchten Stellen zurückgesetzt
+        self._distances = None
+
+    def find(self, label):
+        parent = self.parent
+        root = label
+        while root in parent:
+            root = parent[root]
+        # Pfad verkürzen
+        while label != root:
+            parent[label], label = root, parent[label]
+        return root
+
+    def add(self, x, y):
+        """Tile (x, y) ist begehbar geworden"""
+        labels = self.labels
+        height, width = labels.shape
+        if labels[y, x] >= 0:
+            return
+        roots = set()
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= nx < width and 0 <= ny < height and labels[ny, nx] >= 0:
+                roots.add(self.find(int(labels[ny, nx])))
+        if roots:
+            label = min(roots)
+            for root in roots:
+                if root != label:
+                    self.parent[root] = label
+        else:
+            label = self.next_label
+            self.next_label += 1
+        labels[y, x] = label
+
+    def connected(self, a, b):
+        """Sind die Tiles a und b ((x, y)) begehbar und verbunden?"""
+        la = int(self.labels[a[1], a[0]])
+        lb = int(self.labels[b[1], b[0]])
+        return la >= 0 and lb >= 0 and self.find(la) == self.find(lb)
+
+    def shortest_path(self, a, b):
+        """Kürzester Weg von a nach b als Liste von (x, y), ohne a, mit b; oder None.
+
+        Breitensuche von beiden Enden gleichzeitig, die Fronten werden als
+        Index-Arrays erweitert (immer die kleinere). Begehbar ist, was ein
+        Label hat; ein Ausschnitt oder Rand wird nicht gebraucht.
+        """
+        if not self.connected(a, b):
+            return None
+        width = self.labels.shape[1]
+        size = self.labels.size
+        start = a[1] * width + a[0]
+        goal = b[1] * width + b[0]
+        if start == goal:
+            return []
+
+        if self._distances is None:
+            self._distances = (np.full(size, -1, dtype=np.int32), np.full(size, -1, dtype=np.int32))
+        distances = self._distances
+        frontiers = [np.array([start], dtype=np.intp), np.array([goal], dtype=np.intp)]
+        visited = [[frontiers[0]], [frontiers[1]]]
+        try:
+            distances[0][start] = 0
+            distances[1][goal] = 0
+            meet = self._meet(distances, frontiers, visited, width)
+            if meet is None:
+                return None
+            return self._trace(distances, meet, width)
+        finally:
+            for side in (0, 1):
+                distances[side][np.concatenate(visited[side])] = -1
+
+    def _meet(self, distances, frontiers, visited, width):
+        """Erweitert die Fronten bis zur ersten Berührung; Treffpunkt oder None"""
+        passable = self.labels.ravel()
+        size = passable.size
+        depths = [0, 0]
+        while True:
+            side = 0 if frontiers[0].size <= frontiers[1].size else 1
+            frontier = frontiers[side]
+            xs = frontier % width
+            candidates = np.concatenate((
+                frontier[xs < width - 1] + 1, frontier[xs > 0] - 1,
+                frontier[frontier < size - width] + width, frontier[frontier >= width] - width))
+            own = distances[side]
+            candidates = np.unique(candidates[(passable[candidates] >= 0) & (own[candidates] < 0)])
+            if candidates.size == 0:
+                return None
+            depths[side] += 1
+            own[candidates] = depths[side]
+            frontiers[side] = candidates
+            visited[side].append(candidates)
+            # Die ganze neue Schicht ansehen, erst dann ist die Summe minimal
+            met = candidates[distances[1 - side][candidates] >= 0]
+            if met.size:
+                return int(met[np.argmin(distances[1 - side][met])])
+
+    def _trace(self, distances, meet, width):
+        """Weg über meet als Liste von (x, y), vom Treffpunkt aus zurückverfolgt"""
+        size = self.labels.size
+        halves = []
+        for side in (0, 1):
+            own = distances[side]
+            node = meet
+            half = []
+            while own[node] > 0:
+                step = own[node] - 1
+                x = node % width
+                for neighbour in (node + 1 if x < width - 1 else -1, node - 1 if x > 0 else -1,
+                                  node + width if node < size - width else -1,
+                                  node - width if node >= width else -1):
+                    if neighbour >= 0 and own[neighbour] == step:
+                        node = neighbour
+                        break
+                half.append(node)
+            halves.append(half)
+        to_start, to_goal = halves
+        # to_start endet mit start, to_goal mit goal; ist meet selbst start,
+        # gehört es nicht in den Weg
+        nodes = (to_start[-2::-1] + [meet] if to_start else []) + to_goal
+        return [(node % width, node // width) for node in nodes]
+
+
+def label_components(walkable):
+    """Beschriftet die Komponenten eines bool-Arrays (height, width), vierfach verbunden.
+
+    Gibt (labels als int32, -1 = nicht begehbar; Anzahl vergebener Labels)
+    zurück. Erst werden waagrechte Läufe nummeriert, dann die Läufe
+    übereinanderliegender Zeilen per Union-Find (vektorisiert, mit
+    Zeigersprüngen) zusammengelegt.
+    """
+    height, width = walkable.shape
+    left = np.zeros_like(walkable)
+    left[:, 1:] = walkable[:, :-1]
+    starts = walkable & ~left
+    runs = int(np.count_nonzero(starts))
+    if runs == 0:
+        return np.full((height, width), -1, dtype=np.int32), 0
+    run_ids = (np.cumsum(starts.ravel()) - 1).reshape(height, width)
+    run_ids[~walkable] = -1
+
+    # Paare von Läufen, die sich senkrecht berühren
+    touching = walkable[:-1] & walkable[1:]
+    pairs = np.unique(run_ids[:-1][touching].astype(np.int64) * runs + run_ids[1:][touching])
+    upper, lower = pairs // runs, pairs % runs
+
+    parent = np.arange(runs)
+    while True:
+        a, b = parent[upper], parent[lower]
+        differ = a != b
+        if not differ.any():
+            break
+        np.minimum.at(parent, np.maximum(a[differ], b[differ]), np.minimum(a[differ], b[differ]))
+        # Zeigersprünge, bis jeder Lauf direkt auf seine Wurzel zeigt
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+
+    labels = np.where(run_ids >= 0, parent[np.maximum(run_ids, 0)], -1).astype(np.int32)
+    return labels, runs
+
+
+def distance_field(walkable, width, start, max_steps):
+    """Breitensuche: Schrittzahl zu jedem Feld (-1 = nicht erreichbar).
+
+    Die Front wird pro Schritt als Index-Array erweitert, der Aufwand
+    wächst mit der Zahl der erreichten Felder, nicht mit der Fläche.
+    """
+    distances = np.full(walkable.size, -1, dtype=np.int32)
+    if not walkable[start]:
+        return distances
+    distances[start] = 0
+    offsets = neighbour_offsets(width)
+    frontier = np.array([start], dtype=np.intp)
+    for step in range(1, max_steps + 1):
+        candidates = (frontier[:, None] + offsets).ravel()
+        candidates = candidates[(walkable[candidates] != 0) & (distances[candidates] < 0)]
+        if candidates.size == 0:
+            break
+        frontier = np.unique(candidates)
+        distances[frontier] = step
+    return distances
+
+
+def find_nearest(walkable, targets, width, start, max_steps, reach=1):
+    """Breitensuche bis zum ersten Feld, von dem aus ein Ziel erreichbar ist.
+
+    targets markiert die gesuchten Felder, reach ist der Index-Versatz vom
+    Standfeld zum Ziel (1 = rechts daneben, wie Player.mine_right). Gibt
+    (Ziel, Standfeld, Schritte) zurück, bei mehreren gleich weit entfernten
+    das mit dem kleinsten Index, oder None.
+    """
+    if not walkable[start]:
+        return None
+    if targets[start + reach]:
+        return start + reach, start, 0
+    visited = np.zeros(walkable.size, dtype=bool)
+    visited[start] = True
+    offsets = neighbour_offsets(width)
+    frontier = np.array([start], dtype=np.intp)
+    for step in range(1, max_steps + 1):
+        candidates = (frontier[:, None] + offsets).ravel()
+        candidates = candidates[(walkable[candidates] != 0) & ~visited[candidates]]
+        if candidates.size == 0:
+            return None
+        frontier = np.unique(candidates)
+        visited[frontier] = True
+        hits = frontier[targets[frontier + reach]]
+        if hits.size:
+            stand = int(hits[0])
+            return stand + reach, stand, step
+    return None
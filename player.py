@@ -1,7 +1,7 @@
-import pygame
+from crafting import Affordability, Inventory, default_registry
 
 class Player:
-    def __init__(self, x, y, tile_size):
+    def __init__(self, x, y, tile_size, registry=None):
         self.tile_size = tile_size
         self.x = x
         self.y = y
@@ -9,13 +9,17 @@ class Player:
         self.grid_y = y // tile_size
         
         # Inventar
-        self.inventory = {
+        self.inventory = Inventory({
             "Eisen": 0,
             "Kohle": 0,
             "Magnesium": 0,
             "Holz": 0,
             "Stein": 0
-        }
+        })
+        
+        # Bezahlbare Rezepte, folgt den Inventaränderungen
+        self.registry = registry if registry is not None else default_registry()
+        self.affordability = Affordability(self.registry, self.inventory)
         
         # Bewegungsgeschwindigkeit
         self.speed = tile_size
@@ -50,6 +54,28 @@ class Player:
             return True
         return False
             
+    def can_build(self, recipe):
+        """Reicht das Inventar für recipe (Rezept aus der RecipeRegistry)?"""
+        return self.affordability.can_afford(recipe)
+        
+    def build(self, recipe, world):
+        """Stellt recipe her und zieht die Kosten ab; True bei Erfolg.
+        
+        Gebäude entstehen auf dem eigenen Feld, Materialien kommen ins Inventar.
+        """
+        if not self.can_build(recipe):
+            return False
+            
+        # Materialien abziehen
+        for material, amount in recipe.cost.items():
+            self.inventory[material] -= amount
+        
+        if recipe.building is not None:
+            world.place_building(self.grid_x, self.grid_y, recipe.building)
+        for material, amount in recipe.output.items():
+            self.inventory[material] = self.inventory.get(material, 0) + amount
+        return True
+            
     def add_to_inventory(self, material):
         """Fügt Material zum Inventar hinzu"""
         if material in self.inventory:
@@ -68,6 +94,9 @@ class Player:
             
     def draw(self, screen, camera_x, camera_y):
         """Zeichnet den Spieler auf dem Bildschirm"""
+        # pygame nur zum Zeichnen; Spiellogik (Server, Simulation) braucht es nicht
+        import pygame
+        
         screen_x = self.x - camera_x
         screen_y = self.y - camera_y
         
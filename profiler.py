@@ -0,0 +1,145 @@
+"""Frame-Profiler für Game.run.
+
+Misst die Dauer jeder Phase eines Frames (handle_events, update,
+World.draw, Player.draw, draw_ui, display.flip), zählt Blits und Tiles
+und hält rollierende Perzentile der Frame-Zeit. Die Werte erscheinen in
+einem Overlay (F3) und lassen sich als Chrome-Trace (chrome://tracing,
+Perfetto) exportieren (F4 oder beim Beenden).
+
+Der Profiler ist opt-in: ohne ihn ruft Game.run keine Messfunktionen auf.
+Messung und Trace brauchen kein pygame (server.py nutzt percentile), es
+wird erst für Tasten und Overlay geladen.
+"""
+import json
+import os
+import time
+from collections import deque
+
+# Anzahl Frames für Perzentile und Trace-Export
+DEFAULT_WINDOW = 600
+DEFAULT_TRACE_FRAMES = 3600
+
+
+def percentile(sorted_values, fraction):
+    """Perzentil (Nearest-Rank) einer sortierten Liste"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class FrameProfiler:
+    def __init__(self, window=DEFAULT_WINDOW, trace_frames=DEFAULT_TRACE_FRAMES, trace_path=None):
+        self.overlay_visible = False
+        self.trace_path = trace_path
+        self.frame_times = deque(maxlen=window)
+        self.phase_times = {}
+        self.counters = {}
+        self.last_counters = {}
+        # Pro Frame: (Start, [(Phase, Start, Dauer)], Zähler)
+        self.trace = deque(maxlen=trace_frames)
+        self.frame_index = 0
+        self._window = window
+        self._font = None
+        self._frame_start = 0.0
+        self._lap_start = 0.0
+        self._laps = []
+
+    def start_frame(self):
+        now = time.perf_counter()
+        self._frame_start = now
+        self._lap_start = now
+        self._laps = []
+        self.counters = {}
+
+    def lap(self, phase):
+        """Schließt die laufende Phase ab (Zeit seit dem letzten lap)"""
+        now = time.perf_counter()
+        self._laps.append((phase, self._lap_start, now - self._lap_start))
+        self._lap_start = now
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def end_frame(self):
+        """Beendet den Frame; Wartezeit nach dem letzten lap zählt nicht mit"""
+        frame_time = self._lap_start - self._frame_start
+        self.frame_times.append(frame_time)
+        for phase, _, duration in self._laps:
+            times = self.phase_times.get(phase)
+            if times is None:
+                times = self.phase_times[phase] = deque(maxlen=self._window)
+            times.append(duration)
+        self.trace.append((self._frame_start, self._laps, self.counters))
+        self.last_counters = self.counters
+        self.frame_index += 1
+
+    def stats(self):
+        """Perzentile der Frame-Zeit und Mittelwerte der Phasen in ms"""
+        ordered = sorted(self.frame_times)
+        result = {
+            "frames": len(ordered),
+            "p50": percentile(ordered, 0.50) * 1000,
+            "p95": percentile(ordered, 0.95) * 1000,
+            "p99": percentile(ordered, 0.99) * 1000,
+            "phases": {},
+            "counters": dict(self.last_counters),
+        }
+        for phase, times in self.phase_times.items():
+            result["phases"][phase] = sum(times) / len(times) * 1000 if times else 0.0
+        return result
+
+    def handle_key(self, key):
+        """F3 schaltet das Overlay, F4 schreibt den Trace; True wenn verarbeitet"""
+        import pygame
+        if key == pygame.K_F3:
+            self.overlay_visible = not self.overlay_visible
+            return True
+        if key == pygame.K_F4:
+            self.export_trace()
+            return True
+        return False
+
+    def draw_overlay(self, screen):
+        """Zeichnet das Overlay, gibt den überdeckten Bereich zurück (oder None)"""
+        if not self.overlay_visible:
+            return None
+        import pygame
+        if self._font is None:
+            self._font = pygame.font.Font(None, 20)
+
+        stats = self.stats()
+        lines = [f"Frame p50 {stats['p50']:.2f}  p95 {stats['p95']:.2f}  p99 {stats['p99']:.2f} ms"]
+        for phase, ms in stats["phases"].items():
+            lines.append(f"  {phase:<14} {ms:7.3f} ms")
+        for name, value in stats["counters"].items():
+            lines.append(f"  {name:<14} {value:7d}")
+
+        width = 300
+        height = 16 * len(lines) + 8
+        x = screen.get_width() - width - 10
+        y = screen.get_height() - height - 10
+        background = pygame.Surface((width, height))
+        background.set_alpha(180)
+        background.fill((0, 0, 0))
+        screen.blit(background, (x, y))
+        for i, line in enumerate(lines):
+            screen.blit(self._font.render(line, True, (255, 255, 0)), (x + 6, y + 4 + i * 16))
+        return pygame.Rect(x, y, width, height)
+
+    def export_trace(self, path=None):
+        """Schreibt die aufgezeichneten Frames im Chrome-Trace-Format (JSON)"""
+        path = path or self.trace_path or "frame_trace.json"
+        events = []
+        if self.trace:
+            origin = self.trace[0][0]
+            for frame_start, laps, counters in self.trace:
+                for phase, start, duration in laps:
+                    events.append({"name": phase, "ph": "X", "pid": os.getpid(), "tid": 0,
+                                   "ts": (start - origin) * 1e6, "dur": duration * 1e6})
+                if counters:
+                    events.append({"name": "counters", "ph": "C", "pid": os.getpid(),
+                                   "ts": (frame_start - origin) * 1e6, "args": counters})
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
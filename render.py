@@ -0,0 +1,292 @@
+from collections import OrderedDict
+import pygame
+
+# Kantenlänge eines vorgerenderten Chunks in Tiles
+RENDER_CHUNK_SIZE = 16
+
+# Lichtlevel werden für den Sprite-Cache auf 1/LIGHT_STEPS gerundet. Bei 40
+# Stufen sind Grundlicht (0.3) und die Lagerfeuer-Stufen (je 0.175) exakt.
+LIGHT_STEPS = 40
+
+# Speicherbudget für vorgerenderte Chunk-Surfaces (Bytes)
+DEFAULT_SURFACE_BUDGET = 64 * 1024 * 1024
+
+
+def draw_tile(screen, colors, tile_size, material, collected, light_level, screen_x, screen_y):
+    """Zeichnet ein einzelnes Tile aus Grundformen"""
+    # Grundfarbe
+    color = colors.get(material, (100, 100, 100))
+
+    # Lichtlevel anwenden
+    color = tuple(int(c * light_level) for c in color)
+
+    # Wenn gesammelt, dunkler machen
+    if collected:
+        color = tuple(max(0, c - 30) for c in color)
+
+    # Tile zeichnen
+    pygame.draw.rect(screen, color,
+                   (screen_x, screen_y, tile_size, tile_size))
+
+    # Spezielle Darstellung für Stein (geriffelt)
+    if material == "Stein" and not collected:
+        # Dunklere Linien für Riffel-Effekt
+        riffle_color = tuple(max(0, int(c * 0.7)) for c in color)
+        # Horizontale Linien alle 4 Pixel
+        for i in range(0, tile_size, 4):
+            pygame.draw.line(screen, riffle_color,
+                           (screen_x, screen_y + i),
+                           (screen_x + tile_size, screen_y + i), 1)
+        # Vertikale Linien alle 8 Pixel für Kreuzriffeln
+        for i in range(0, tile_size, 8):
+            pygame.draw.line(screen, riffle_color,
+                           (screen_x + i, screen_y),
+                           (screen_x + i, screen_y + tile_size), 1)
+
+    # Spezielle Darstellung für Eisen (Metallglanz)
+    if material == "Eisen" and not collected:
+        # Hellere Punkte für Metallglanz
+        base_shine = tuple(min(255, c + 50) for c in colors["Eisen"])
+        shine_color = tuple(int(c * light_level) for c in base_shine)
+        # Diagonale Glanzpunkte
+        for i in range(4, tile_size - 4, 6):
+            for j in range(4, tile_size - 4, 6):
+                if (i + j) % 12 == 4:  # Diagonales Muster
+                    pygame.draw.circle(screen, shine_color,
+                                     (screen_x + i, screen_y + j), 1)
+
+    # Spezielle Darstellung für Wald (Baum-Muster)
+    if material == "Wald" and not collected:
+        # Hellere Punkte für Baum-Textur
+        base_tree = tuple(min(255, c + 30) for c in colors["Wald"])
+        tree_color = tuple(int(c * light_level) for c in base_tree)
+        # Kleine Rechtecke als Bäume
+        for i in range(4, tile_size - 4, 8):
+            for j in range(4, tile_size - 4, 8):
+                pygame.draw.rect(screen, tree_color,
+                               (screen_x + i, screen_y + j, 4, 4))
+
+    # Raster-Linien (optional, für 8-Bit Look)
+    pygame.draw.rect(screen, (50, 50, 50),
+                   (screen_x, screen_y, tile_size, tile_size), 1)
+
+
+def draw_building(screen, tile_size, building_type, screen_x, screen_y, color=None):
+    """Zeichnet ein Gebäude aus Grundformen.
+    
+    Gebäude ohne eigene Grafik werden mit color (aus recipes.json) als
+    Quadrat mit Rand gezeichnet.
+    """
+    if building_type == "Lagerfeuer":
+        # Lagerfeuer als oranges Quadrat mit Flammen-Effekt
+        pygame.draw.rect(screen, (255, 140, 0),
+                       (screen_x, screen_y, tile_size, tile_size))
+        # Flammen-Punkte
+        for i in range(8, tile_size - 8, 4):
+            for j in range(8, tile_size - 8, 4):
+                pygame.draw.circle(screen, (255, 69, 0),
+                                 (screen_x + i, screen_y + j), 2)
+    elif color is not None:
+        pygame.draw.rect(screen, color,
+                       (screen_x + 4, screen_y + 4, tile_size - 8, tile_size - 8))
+        pygame.draw.rect(screen, (255, 255, 255),
+                       (screen_x + 4, screen_y + 4, tile_size - 8, tile_size - 8), 2)
+
+
+def _new_surface(size):
+    surface = pygame.Surface(size)
+    # An das Pixelformat des Displays anpassen, falls eines existiert
+    if pygame.display.get_surface() is not None:
+        surface = surface.convert()
+    return surface
+
+
+class TileSprites:
+    """Cache vorgerenderter Tiles, Schlüssel (Material, gesammelt, Lichtstufe)"""
+
+    def __init__(self, tile_size, colors, building_colors=None):
+        self.tile_size = tile_size
+        self.colors = colors
+        # Gebäudetyp -> Farbe für Gebäude ohne eigene Grafik
+        self.building_colors = building_colors or {}
+        self.tiles = {}
+        self.buildings = {}
+
+    def tile(self, material, collected, light_step):
+        key = (material, collected, light_step)
+        sprite = self.tiles.get(key)
+        if sprite is None:
+            sprite = _new_surface((self.tile_size, self.tile_size))
+            draw_tile(sprite, self.colors, self.tile_size, material, collected,
+                      light_step / LIGHT_STEPS, 0, 0)
+            self.tiles[key] = sprite
+        return sprite
+
+    def building(self, building_type):
+        sprite = self.buildings.get(building_type)
+        if sprite is None:
+            sprite = _new_surface((self.tile_size, self.tile_size))
+            # Unbekannte Gebäudetypen zeichnen nichts -> transparent lassen
+            sprite.set_colorkey((255, 0, 255))
+            sprite.fill((255, 0, 255))
+            draw_building(sprite, self.tile_size, building_type, 0, 0,
+                          self.building_colors.get(building_type))
+            self.buildings[building_type] = sprite
+        return sprite
+
+
+class WorldRenderer:
+    """Zeichnet die Welt aus vorgerenderten Chunk-Surfaces.
+
+    Jeder Render-Chunk (RENDER_CHUNK_SIZE x RENDER_CHUNK_SIZE Tiles) wird
+    einmal aus Tile-Sprites zusammengesetzt und danach pro Frame nur noch
+    mit dem Kamera-Versatz geblittet. World meldet geänderte Bereiche
+    (gesammelte Tiles, Gebäude, Licht) über invalidate(), betroffene
+    Surfaces werden beim nächsten Zeichnen neu aufgebaut. Die Gebäude sind
+    nach Render-Chunk einsortiert, ein Chunk sieht nur seine eigenen nach.
+    """
+
+    def __init__(self, world, chunk_size=RENDER_CHUNK_SIZE,
+                 surface_budget=DEFAULT_SURFACE_BUDGET):
+        self.world = world
+        self.tile_size = world.tile_size
+        self.chunk_size = chunk_size
+        self.chunk_pixels = chunk_size * world.tile_size
+        self.sprites = TileSprites(world.tile_size, world.colors,
+                                   {name: building["color"]
+                                    for name, building in world.registry.buildings.items()})
+        self.surfaces = OrderedDict()
+        self.placeholder = None
+        # Zähler des letzten draw()-Aufrufs (für den Profiler)
+        self.blit_count = 0
+        self.visible_tiles = 0
+        self.baked_tiles = 0
+        # Surface-Budget in Anzahl Chunks (32 Bit pro Pixel)
+        self.max_surfaces = max(1, surface_budget // (self.chunk_pixels * self.chunk_pixels * 4))
+        # Render-Chunk -> Positionen der Gebäude darin
+        self.buildings = {}
+        for x, y in world.buildings:
+            self.building_changed(x, y)
+        world.add_listener(self.invalidate)
+        world.building_listeners.append(self.building_changed)
+
+    def building_changed(self, x, y):
+        """Trägt das Feld (x, y) nach Bau oder Abriss im Gebäude-Index nach"""
+        key = (x // self.chunk_size, y // self.chunk_size)
+        if (x, y) in self.world.buildings:
+            self.buildings.setdefault(key, set()).add((x, y))
+        else:
+            positions = self.buildings.get(key)
+            if positions is not None:
+                positions.discard((x, y))
+                if not positions:
+                    del self.buildings[key]
+
+    def invalidate(self, x0, y0, x1, y1):
+        """Markiert alle Render-Chunks im Tile-Rechteck (inklusive) als veraltet"""
+        size = self.chunk_size
+        for rcx in range(x0 // size, x1 // size + 1):
+            for rcy in range(y0 // size, y1 // size + 1):
+                self.surfaces.pop((rcx, rcy), None)
+
+    def draw(self, screen, camera_x, camera_y, screen_width, screen_height):
+        """Blittet alle sichtbaren Render-Chunks"""
+        world = self.world
+        pixels = self.chunk_pixels
+        start_cx = camera_x // pixels
+        start_cy = camera_y // pixels
+        end_cx = (camera_x + screen_width) // pixels
+        end_cy = (camera_y + screen_height) // pixels
+        if world.world_size is not None:
+            last = (world.world_size - 1) // self.chunk_size
+            start_cx = max(0, start_cx)
+            start_cy = max(0, start_cy)
+            end_cx = min(last, end_cx)
+            end_cy = min(last, end_cy)
+
+        surfaces = self.surfaces
+        self.blit_count = 0
+        self.baked_tiles = 0
+        self.visible_tiles = 0
+        for rcx in range(start_cx, end_cx + 1):
+            for rcy in range(start_cy, end_cy + 1):
+                key = (rcx, rcy)
+                surface = surfaces.get(key)
+                if surface is None and not self._available(rcx, rcy):
+                    # Chunk wird noch im Hintergrund generiert
+                    screen.blit(self._placeholder(), (rcx * pixels - camera_x, rcy * pixels - camera_y))
+                    continue
+                if surface is None:
+                    surface = self._bake(rcx, rcy)
+                    surfaces[key] = surface
+                    while len(surfaces) > self.max_surfaces:
+                        surfaces.popitem(last=False)
+                else:
+                    surfaces.move_to_end(key)
+                screen.blit(surface, (rcx * pixels - camera_x, rcy * pixels - camera_y))
+                self.blit_count += 1
+        self.visible_tiles = self.blit_count * self.chunk_size * self.chunk_size
+
+    def _available(self, rcx, rcy):
+        """Sind alle Welt-Chunks unter dem Render-Chunk sofort verfügbar?"""
+        world = self.world
+        size = self.chunk_size
+        first_x = rcx * size // world.chunk_size
+        first_y = rcy * size // world.chunk_size
+        last_x = ((rcx + 1) * size - 1) // world.chunk_size
+        last_y = ((rcy + 1) * size - 1) // world.chunk_size
+        available = True
+        for cx in range(first_x, last_x + 1):
+            for cy in range(first_y, last_y + 1):
+                if not world.chunk_available(cx, cy):
+                    available = False
+        return available
+
+    def _placeholder(self):
+        """Schachbrett für Bereiche, die noch nicht fertig generiert sind"""
+        if self.placeholder is None:
+            surface = _new_surface((self.chunk_pixels, self.chunk_pixels))
+            surface.fill((20, 20, 20))
+            for tx in range(self.chunk_size):
+                for ty in range(tx % 2, self.chunk_size, 2):
+                    surface.fill((35, 35, 35), (tx * self.tile_size, ty * self.tile_size,
+                                                self.tile_size, self.tile_size))
+            self.placeholder = surface
+        return self.placeholder
+
+    def _bake(self, rcx, rcy):
+        """Setzt die Surface eines Render-Chunks aus Tile-Sprites zusammen"""
+        world = self.world
+        size = self.chunk_size
+        tile_size = self.tile_size
+        sprites = self.sprites
+        surface = _new_surface((self.chunk_pixels, self.chunk_pixels))
+        surface.fill((0, 0, 0))
+
+        x0 = rcx * size
+        y0 = rcy * size
+        x1 = x0 + size
+        y1 = y0 + size
+        if world.world_size is not None:
+            x1 = min(x1, world.world_size)
+            y1 = min(y1, world.world_size)
+
+        level = world.get_light_level
+        blits = []
+        for x in range(x0, x1):
+            for y in range(y0, y1):
+                chunk = world.get_chunk(x, y)
+                lx = x % world.chunk_size
+                ly = y % world.chunk_size
+                light_step = round(level(x, y) * LIGHT_STEPS)
+                sprite = sprites.tile(chunk.grid.material(lx, ly), chunk.grid.is_collected(lx, ly),
+                                      light_step)
+                blits.append((sprite, ((x - x0) * tile_size, (y - y0) * tile_size)))
+        surface.blits(blits, doreturn=False)
+        self.baked_tiles += len(blits)
+
+        # Gebäude über die Tiles, nur die dieses Render-Chunks
+        for bx, by in self.buildings.get((rcx, rcy), ()):
+            surface.blit(sprites.building(world.buildings[(bx, by)]["type"]),
+                         ((bx - x0) * tile_size, (by - y0) * tile_size))
+        return surface
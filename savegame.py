@@ -0,0 +1,296 @@
+"""Spielstände im Binärformat.
+
+Ein Spielstand ist ein Verzeichnis:
+
+    world.meta            Kopf, Gebäude und Spieler (klein, immer komplett geschrieben)
+    chunks/<cx>_<cy>.chunk  Tile-Daten eines Chunks, roh und per mmap ladbar:
+                          chunk_size² Bytes Material-IDs, danach die
+                          Gesammelt-Bitmaske
+    world.journal         Änderungen seit dem letzten Speichern (journal.py)
+
+Beim Laden werden Chunks erst gemappt, wenn die Welt sie braucht. Beim
+Speichern werden nur veränderte Chunks neu geschrieben, jede Datei über
+eine temporäre Datei und os.replace (atomar). Die Daten werden im
+Hauptthread kopiert, das Schreiben läuft in einem Hintergrund-Thread.
+"""
+import mmap
+import os
+import struct
+import threading
+
+import journal
+from player import Player
+from tilegrid import TileGrid
+from world import World
+
+MAGIC = b"SRCHSAVE"
+VERSION = 1
+
+META_FILE = "world.meta"
+CHUNK_DIR = "chunks"
+
+# Magic, Version, Weltgröße (-1 = unendlich), Chunkgröße, Seed
+_HEADER = struct.Struct("<8sHiHq")
+_COUNT = struct.Struct("<I")
+# x, y, Lichtweite, Länge des Typnamens
+_BUILDING = struct.Struct("<iihB")
+# grid_x, grid_y, Anzahl Inventar-Einträge
+_PLAYER = struct.Struct("<iiH")
+# Länge des Materialnamens, Anzahl
+_ITEM = struct.Struct("<BI")
+
+
+class ChunkStore:
+    """Chunk-Dateien eines Spielstands, per mmap (copy-on-write) eingeblendet"""
+
+    def __init__(self, path, chunk_size):
+        self.path = path
+        self.chunk_dir = os.path.join(path, CHUNK_DIR)
+        self.chunk_size = chunk_size
+        self.material_bytes = chunk_size * chunk_size
+        self.chunk_bytes = self.material_bytes + (self.material_bytes + 7) // 8
+        self.on_disk = set()
+        self.mapped = {}
+
+        if os.path.isdir(self.chunk_dir):
+            for name in os.listdir(self.chunk_dir):
+                if name.endswith(".chunk"):
+                    cx, cy = name[:-len(".chunk")].split("_")
+                    self.on_disk.add((int(cx), int(cy)))
+
+    def chunk_path(self, cx, cy):
+        return os.path.join(self.chunk_dir, f"{cx}_{cy}.chunk")
+
+    def has(self, cx, cy):
+        return (cx, cy) in self.on_disk
+
+    def map_chunk(self, cx, cy):
+        """Blendet die Chunk-Datei ein; Änderungen bleiben im Speicher"""
+        self.release(cx, cy)
+        with open(self.chunk_path(cx, cy), "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        if len(mapping) != self.chunk_bytes:
+            mapping.close()
+            raise ValueError(f"Chunk-Datei ({cx}, {cy}) hat eine ungültige Größe")
+        view = memoryview(mapping)
+        grid = TileGrid(self.chunk_size, self.chunk_size,
+                        view[:self.material_bytes], view[self.material_bytes:])
+        self.mapped[(cx, cy)] = (mapping, view, grid)
+        return grid
+
+    def read_collected(self, cx, cy):
+        """Gesammelt-Bitmaske eines Chunks direkt aus der Datei, ohne ihn zu laden"""
+        entry = self.mapped.get((cx, cy))
+        if entry is not None:
+            return bytes(entry[2].collected)
+        with open(self.chunk_path(cx, cy), "rb") as f:
+            f.seek(self.material_bytes)
+            return f.read(self.chunk_bytes - self.material_bytes)
+
+    def release(self, cx, cy):
+        """Kopiert einen gemappten Chunk in den Speicher und schließt die Datei"""
+        entry = self.mapped.pop((cx, cy), None)
+        if entry is None:
+            return
+        mapping, view, grid = entry
+        materials, collected = grid.materials, grid.collected
+        grid.materials = bytearray(materials)
+        grid.collected = bytearray(collected)
+        try:
+            materials.release()
+            collected.release()
+            view.release()
+            mapping.close()
+        except BufferError:
+            # Noch NumPy-Sichten aktiv; die Abbildung wird mit ihnen freigegeben
+            pass
+
+    def write_chunk(self, cx, cy, data):
+        os.makedirs(self.chunk_dir, exist_ok=True)
+        _write_atomic(self.chunk_path(cx, cy), data)
+        self.on_disk.add((cx, cy))
+
+
+def _write_atomic(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _pack_name(name):
+    data = name.encode("utf-8")
+    if len(data) > 255:
+        raise ValueError(f"Name zu lang: {name!r}")
+    return data
+
+
+def _encode_meta(world, player):
+    parts = [_HEADER.pack(MAGIC, VERSION,
+                          -1 if world.world_size is None else world.world_size,
+                          world.chunk_size, world.seed)]
+
+    parts.append(_COUNT.pack(len(world.buildings)))
+    for (x, y), building in world.buildings.items():
+        name = _pack_name(building["type"])
+        parts.append(_BUILDING.pack(x, y, building["light_range"], len(name)))
+        parts.append(name)
+
+    parts.append(_PLAYER.pack(player.grid_x, player.grid_y, len(player.inventory)))
+    for material, count in player.inventory.items():
+        name = _pack_name(material)
+        parts.append(_ITEM.pack(len(name), count))
+        parts.append(name)
+    return b"".join(parts)
+
+
+def _decode_meta(data):
+    magic, version, world_size, chunk_size, seed = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("Keine Spielstand-Datei")
+    if version != VERSION:
+        raise ValueError(f"Unbekannte Spielstand-Version {version}")
+    offset = _HEADER.size
+
+    (count,) = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    buildings = []
+    for _ in range(count):
+        x, y, light_range, length = _BUILDING.unpack_from(data, offset)
+        offset += _BUILDING.size
+        name = data[offset:offset + length].decode("utf-8")
+        offset += length
+        buildings.append((x, y, name, light_range))
+
+    grid_x, grid_y, count = _PLAYER.unpack_from(data, offset)
+    offset += _PLAYER.size
+    inventory = {}
+    for _ in range(count):
+        length, amount = _ITEM.unpack_from(data, offset)
+        offset += _ITEM.size
+        inventory[data[offset:offset + length].decode("utf-8")] = amount
+        offset += length
+
+    return {
+        "world_size": None if world_size < 0 else world_size,
+        "chunk_size": chunk_size,
+        "seed": seed,
+        "buildings": buildings,
+        "player": (grid_x, grid_y, inventory),
+    }
+
+
+class SaveGame:
+    """Speichert und lädt World und Player in einem Spielstand-Verzeichnis"""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread = None
+        # journal.Journal, nach open_journal()
+        self.journal = None
+
+    def exists(self):
+        return os.path.isfile(os.path.join(self.path, META_FILE)) or journal.exists(self.path)
+
+    def load(self, tile_size, **world_options):
+        """Lädt den Spielstand und spielt das Journal ab, gibt (world, player) zurück.
+
+        Gibt es nur ein Journal (Absturz vor dem ersten Speichern), wird
+        es auf die frisch generierte Welt abgespielt.
+        """
+        meta_path = os.path.join(self.path, META_FILE)
+        if os.path.isfile(meta_path):
+            with open(meta_path, "rb") as f:
+                meta = _decode_meta(f.read())
+
+            store = ChunkStore(self.path, meta["chunk_size"])
+            world = World(tile_size, world_size=meta["world_size"], chunk_size=meta["chunk_size"],
+                          store=store, seed=meta["seed"], **world_options)
+            for x, y, building_type, light_range in meta["buildings"]:
+                world.buildings[(x, y)] = {"type": building_type, "light_range": light_range}
+                world.light.set_source(x, y, light_range)
+
+            grid_x, grid_y, inventory = meta["player"]
+            player = Player(grid_x * tile_size, grid_y * tile_size, tile_size, registry=world.registry)
+            player.inventory.update(inventory)
+        else:
+            world_size, chunk_size, seed = journal.read_header(self.path)
+            world = World(tile_size, world_size=world_size, chunk_size=chunk_size, seed=seed,
+                          **world_options)
+            player = Player(world.spawn_x, world.spawn_y, tile_size, registry=world.registry)
+
+        journal.replay(self.path, world, player)
+        return world, player
+
+    def open_journal(self, world, player):
+        """Schreibt ab jetzt alle Änderungen von world und player ins Journal"""
+        self.journal = journal.Journal(self.path, world)
+        self.journal.attach(world, player)
+
+    def needs_compaction(self):
+        """Ist das Journal so lang, dass vor dem nächsten Autosave gespeichert werden sollte?"""
+        return self.journal is not None and self.journal.needs_compaction()
+
+    def close(self):
+        """Wartet auf das Speichern und schließt das Journal"""
+        self.wait()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def save(self, world, player, wait=False):
+        """Schreibt alle seit dem letzten Speichern veränderten Daten.
+
+        Im Hauptthread werden nur die betroffenen Chunks kopiert; das
+        Schreiben übernimmt ein Hintergrund-Thread (wait=True wartet darauf).
+        """
+        self.wait()
+
+        store = world.store
+        if store is None or store.path != self.path:
+            store = ChunkStore(self.path, world.chunk_size)
+            world.store = store
+
+        keys = world.chunks.dirty_keys()
+        if world.world_size is not None:
+            # Begrenzte Welten sind nicht chunkweise regenerierbar -> alle
+            # Chunks müssen mindestens einmal auf der Platte liegen
+            count = -(-world.world_size // world.chunk_size)
+            keys |= {(cx, cy) for cx in range(count) for cy in range(count)} - store.on_disk
+
+        chunk_data = []
+        for cx, cy in keys:
+            chunk = world.chunks.get(cx, cy)
+            # Gemappte Datei freigeben, sie wird gleich ersetzt
+            store.release(cx, cy)
+            chunk.dirty = False
+            chunk_data.append((cx, cy, bytes(chunk.grid.materials) + bytes(chunk.grid.collected)))
+        world.chunks.evicted_dirty.clear()
+        meta = _encode_meta(world, player)
+        # Alles bisher Journalisierte steckt in diesem Spielstand
+        rotated = self.journal.rotate() if self.journal is not None else None
+
+        self._thread = threading.Thread(target=self._write, args=(store, chunk_data, meta, rotated),
+                                        daemon=True)
+        self._thread.start()
+        if wait:
+            self.wait()
+
+    def wait(self):
+        """Wartet auf einen laufenden Speichervorgang"""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _write(self, store, chunk_data, meta, rotated):
+        for cx, cy, data in chunk_data:
+            store.write_chunk(cx, cy, data)
+        # Meta-Datei zuletzt: verweist nie auf Chunks, die noch fehlen
+        _write_atomic(os.path.join(self.path, META_FILE), meta)
+        # Erst jetzt ist das alte Journal überflüssig; scheiterte die
+        # Rotation, wirft wait() und world.journal.old bleibt liegen
+        if rotated is not None:
+            rotated.wait()
+            os.remove(os.path.join(self.path, journal.OLD_JOURNAL_FILE))
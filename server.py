@@ -0,0 +1,455 @@
+"""Welt-Server für viele Agenten (Bots, später Netzwerk-Spieler).
+
+Agenten schicken Befehle (laufen, abbauen, bauen), der Server sammelt sie
+und wendet sie einmal pro Tick gemeinsam an. Pro Tick entsteht ein
+kompakter Diff (gesammelte Tiles, neue Gebäude, bewegte Agenten,
+abgelehnte Befehle) statt des ganzen Zustands.
+
+Reihenfolge innerhalb eines Ticks: erst abbauen, dann bauen, dann
+laufen, jeweils nach Agenten-ID. Wollen mehrere Agenten dasselbe Tile
+abbauen oder auf demselben Tile bauen, gewinnt die kleinste ID, die
+anderen bekommen CONFLICT.
+
+SocketServer und SocketClient stellen dasselbe über TCP bereit (ein Agent
+pro Verbindung), zum Testen über Loopback.
+
+    python server.py --agents 1000 --ticks 200
+"""
+import argparse
+import random
+import selectors
+import socket
+import struct
+import sys
+import time
+
+from player import Player
+from profiler import percentile
+from world import World
+
+# Befehle
+MOVE = 1
+MINE = 2
+BUILD = 3
+
+# Gründe für abgelehnte Befehle
+INVALID = 1
+BLOCKED = 2
+NOTHING = 3
+CONFLICT = 4
+NOT_ENOUGH = 5
+
+# Diff: Tick, Anzahl gesammelt, Gebäude, bewegt, abgelehnt
+_DIFF_HEADER = struct.Struct("<IIIII")
+# x, y, Agent
+_COLLECTED = struct.Struct("<iiI")
+# x, y, Länge des Typnamens
+_BUILDING = struct.Struct("<iiB")
+# Agent, x, y
+_MOVED = struct.Struct("<Iii")
+# Agent, Grund
+_REJECTED = struct.Struct("<IB")
+
+# Nachrichten über TCP: Länge, Typ; Befehle haben feste Größe
+_FRAME = struct.Struct("<IB")
+_COMMAND = struct.Struct("<Bbb")
+_WELCOME = struct.Struct("<I")
+MSG_WELCOME = 1
+MSG_DIFF = 2
+
+
+class TickDiff:
+    """Änderungen eines Ticks"""
+
+    __slots__ = ("tick", "collected", "buildings", "moved", "rejected")
+
+    def __init__(self, tick):
+        self.tick = tick
+        # (x, y, agent_id)
+        self.collected = []
+        # (x, y, Gebäudetyp)
+        self.buildings = []
+        # (agent_id, grid_x, grid_y)
+        self.moved = []
+        # (agent_id, Grund)
+        self.rejected = []
+
+    def __eq__(self, other):
+        return isinstance(other, TickDiff) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def encode(self):
+        parts = [_DIFF_HEADER.pack(self.tick, len(self.collected), len(self.buildings),
+                                   len(self.moved), len(self.rejected))]
+        parts.extend(_COLLECTED.pack(*entry) for entry in self.collected)
+        for x, y, building_type in self.buildings:
+            name = building_type.encode("utf-8")
+            parts.append(_BUILDING.pack(x, y, len(name)))
+            parts.append(name)
+        parts.extend(_MOVED.pack(*entry) for entry in self.moved)
+        parts.extend(_REJECTED.pack(*entry) for entry in self.rejected)
+        return b"".join(parts)
+
+    @classmethod
+    def decode(cls, data):
+        tick, collected, buildings, moved, rejected = _DIFF_HEADER.unpack_from(data, 0)
+        diff = cls(tick)
+        offset = _DIFF_HEADER.size
+        for _ in range(collected):
+            diff.collected.append(_COLLECTED.unpack_from(data, offset))
+            offset += _COLLECTED.size
+        for _ in range(buildings):
+            x, y, length = _BUILDING.unpack_from(data, offset)
+            offset += _BUILDING.size
+            diff.buildings.append((x, y, data[offset:offset + length].decode("utf-8")))
+            offset += length
+        for _ in range(moved):
+            diff.moved.append(_MOVED.unpack_from(data, offset))
+            offset += _MOVED.size
+        for _ in range(rejected):
+            diff.rejected.append(_REJECTED.unpack_from(data, offset))
+            offset += _REJECTED.size
+        return diff
+
+
+class WorldServer:
+    """Sammelt Befehle der Agenten und wendet sie pro Tick gemeinsam an.
+
+    Jeder Agent ist ein Player. Pro Tick zählt der letzte Befehl eines
+    Agenten; Befehle sind (MOVE, dx, dy) mit einem Schritt, (MINE, 0, 0)
+    für das Feld rechts daneben (wie Player.mine_right) und
+    (BUILD, index, 0) für ein Rezept aus build_items (Standard: alle
+    Rezepte der RecipeRegistry der Welt, auch die ohne Gebäude).
+    """
+
+    def __init__(self, world, build_items=None):
+        self.world = world
+        self.build_items = world.registry.recipes if build_items is None else build_items
+        self.agents = {}
+        self.pending = {}
+        self.tick_count = 0
+        self.listeners = []
+        self._next_id = 1
+
+    def add_agent(self, grid_x, grid_y):
+        """Setzt einen neuen Agenten auf (grid_x, grid_y), gibt seine ID zurück"""
+        agent_id = self._next_id
+        self._next_id += 1
+        tile_size = self.world.tile_size
+        self.agents[agent_id] = Player(grid_x * tile_size, grid_y * tile_size, tile_size,
+                                       registry=self.world.registry)
+        return agent_id
+
+    def remove_agent(self, agent_id):
+        self.agents.pop(agent_id, None)
+        self.pending.pop(agent_id, None)
+
+    def submit(self, agent_id, command, a=0, b=0):
+        """Merkt einen Befehl für den nächsten Tick vor (ersetzt einen früheren)"""
+        if agent_id in self.agents:
+            self.pending[agent_id] = (command, a, b)
+
+    def subscribe(self, callback):
+        """Registriert callback(diff) für jeden Tick"""
+        self.listeners.append(callback)
+
+    def tick(self):
+        """Wendet alle vorgemerkten Befehle an und gibt den Diff zurück"""
+        diff = TickDiff(self.tick_count)
+        self.tick_count += 1
+        world = self.world
+        agents = self.agents
+        pending = self.pending
+        self.pending = {}
+
+        mines = {}
+        builds = {}
+        moves = []
+        for agent_id in sorted(pending):
+            command, a, b = pending[agent_id]
+            player = agents[agent_id]
+            if command == MINE:
+                mines.setdefault((player.grid_x + 1, player.grid_y), []).append(agent_id)
+            elif command == BUILD:
+                builds.setdefault((player.grid_x, player.grid_y), []).append((agent_id, a))
+            elif command == MOVE and abs(a) + abs(b) == 1:
+                moves.append((agent_id, a, b))
+            else:
+                diff.rejected.append((agent_id, INVALID))
+
+        # Abbauen: pro Tile gewinnt die kleinste Agenten-ID
+        for (x, y), agent_ids in mines.items():
+            winner = agent_ids[0]
+            if agents[winner].mine_right(world):
+                diff.collected.append((x, y, winner))
+            else:
+                diff.rejected.append((winner, NOTHING))
+            diff.rejected.extend((agent_id, CONFLICT) for agent_id in agent_ids[1:])
+
+        # Bauen: pro Tile höchstens ein Gebäude je Tick
+        build_items = self.build_items
+        for (x, y), requests in builds.items():
+            built = False
+            for agent_id, index in requests:
+                if not 0 <= index < len(build_items):
+                    diff.rejected.append((agent_id, INVALID))
+                elif built and build_items[index].building is not None:
+                    diff.rejected.append((agent_id, CONFLICT))
+                else:
+                    before = world.buildings.get((x, y))
+                    recipe = build_items[index]
+                    if not agents[agent_id].build(recipe, world):
+                        diff.rejected.append((agent_id, NOT_ENOUGH))
+                        continue
+                    # Rezepte ohne Gebäude belegen das Feld nicht
+                    if recipe.building is not None:
+                        built = True
+                    building = world.buildings.get((x, y))
+                    if building is not None and building is not before:
+                        diff.buildings.append((x, y, building["type"]))
+
+        # Laufen: Agenten blockieren sich nicht gegenseitig
+        for agent_id, dx, dy in moves:
+            player = agents[agent_id]
+            x, y = player.grid_x, player.grid_y
+            player.move(dx, dy, world)
+            if (player.grid_x, player.grid_y) != (x, y):
+                diff.moved.append((agent_id, player.grid_x, player.grid_y))
+            else:
+                diff.rejected.append((agent_id, BLOCKED))
+
+        for callback in self.listeners:
+            callback(diff)
+        return diff
+
+    def run(self, tick_rate=20, ticks=None, before_tick=None):
+        """Tick-Schleife mit fester Rate; before_tick() z.B. für Netzwerk-Eingaben.
+
+        Gibt die Dauer jedes Ticks (ohne Wartezeit) in Sekunden zurück.
+        """
+        interval = 1.0 / tick_rate
+        durations = []
+        next_tick = time.perf_counter()
+        while ticks is None or len(durations) < ticks:
+            if before_tick is not None:
+                before_tick()
+            start = time.perf_counter()
+            self.tick()
+            durations.append(time.perf_counter() - start)
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Überlastet: nicht versuchen, verpasste Ticks nachzuholen
+                next_tick = time.perf_counter()
+        return durations
+
+
+class LocalClient:
+    """Agent im selben Prozess: schickt Befehle direkt, sammelt die Diffs"""
+
+    def __init__(self, server, grid_x, grid_y):
+        self.server = server
+        self.agent_id = server.add_agent(grid_x, grid_y)
+        self.diffs = []
+        server.subscribe(self.diffs.append)
+
+    def send(self, command, a=0, b=0):
+        self.server.submit(self.agent_id, command, a, b)
+
+
+class _Connection:
+    __slots__ = ("sock", "agent_id", "inbox", "outbox")
+
+    def __init__(self, sock, agent_id):
+        self.sock = sock
+        self.agent_id = agent_id
+        self.inbox = bytearray()
+        self.outbox = bytearray()
+
+
+def _frame(message_type, payload):
+    return _FRAME.pack(len(payload) + 1, message_type) + payload
+
+
+class SocketServer:
+    """Stellt einen WorldServer über TCP bereit; ein Agent pro Verbindung.
+
+    Der Client bekommt nach dem Verbinden seine Agenten-ID und danach jeden
+    Diff; er schickt Befehle als 3 Bytes (Befehl, a, b). Alles läuft
+    ohne Threads über poll(), das vor jedem Tick aufgerufen wird.
+    """
+
+    def __init__(self, server, spawn, host="127.0.0.1", port=0):
+        self.server = server
+        self.spawn = spawn
+        self.listener = socket.create_server((host, port))
+        self.listener.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.connections = {}
+        server.subscribe(self._broadcast)
+
+    @property
+    def address(self):
+        return self.listener.getsockname()
+
+    def poll(self):
+        """Nimmt Verbindungen an, liest Befehle und verschickt ausstehende Daten"""
+        for key, _ in self.selector.select(timeout=0):
+            if key.fileobj is self.listener:
+                self._accept()
+            else:
+                self._read(self.connections[key.fileobj])
+        for connection in list(self.connections.values()):
+            self._flush(connection)
+
+    def close(self):
+        for connection in list(self.connections.values()):
+            self._drop(connection)
+        self.selector.unregister(self.listener)
+        self.listener.close()
+        self.selector.close()
+
+    def _accept(self):
+        sock, _ = self.listener.accept()
+        sock.setblocking(False)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = _Connection(sock, self.server.add_agent(*self.spawn))
+        self.connections[sock] = connection
+        self.selector.register(sock, selectors.EVENT_READ)
+        connection.outbox += _frame(MSG_WELCOME, _WELCOME.pack(connection.agent_id))
+
+    def _read(self, connection):
+        try:
+            data = connection.sock.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._drop(connection)
+            return
+        inbox = connection.inbox
+        inbox += data
+        size = _COMMAND.size
+        end = len(inbox) - len(inbox) % size
+        for offset in range(0, end, size):
+            self.server.submit(connection.agent_id, *_COMMAND.unpack_from(inbox, offset))
+        del inbox[:end]
+
+    def _broadcast(self, diff):
+        if not self.connections:
+            return
+        frame = _frame(MSG_DIFF, diff.encode())
+        for connection in self.connections.values():
+            connection.outbox += frame
+
+    def _flush(self, connection):
+        if not connection.outbox:
+            return
+        try:
+            sent = connection.sock.send(connection.outbox)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self._drop(connection)
+            return
+        del connection.outbox[:sent]
+
+    def _drop(self, connection):
+        self.selector.unregister(connection.sock)
+        connection.sock.close()
+        del self.connections[connection.sock]
+        self.server.remove_agent(connection.agent_id)
+
+
+class SocketClient:
+    """Gegenstück zu SocketServer (blockierend, für Tests und Bots)"""
+
+    def __init__(self, address, timeout=5.0):
+        self.sock = socket.create_connection(address, timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.buffer = bytearray()
+        message_type, payload = self._receive_frame()
+        if message_type != MSG_WELCOME:
+            raise ValueError("Keine Begrüßung vom Server")
+        (self.agent_id,) = _WELCOME.unpack(payload)
+
+    def send(self, command, a=0, b=0):
+        self.sock.sendall(_COMMAND.pack(command, a, b))
+
+    def receive(self):
+        """Wartet auf den nächsten Diff"""
+        message_type, payload = self._receive_frame()
+        if message_type != MSG_DIFF:
+            raise ValueError(f"Unerwartete Nachricht {message_type}")
+        return TickDiff.decode(payload)
+
+    def close(self):
+        self.sock.close()
+
+    def _receive_frame(self):
+        while True:
+            if len(self.buffer) >= _FRAME.size:
+                length, message_type = _FRAME.unpack_from(self.buffer, 0)
+                end = 4 + length
+                if len(self.buffer) >= end:
+                    payload = bytes(self.buffer[_FRAME.size:end])
+                    del self.buffer[:end]
+                    return message_type, payload
+            data = self.sock.recv(65536)
+            if not data:
+                raise ConnectionError("Verbindung vom Server geschlossen")
+            self.buffer += data
+
+
+def random_commands(server, rng):
+    """Ein zufälliger Befehl pro Agent (Bots für Lasttests)"""
+    steps = ((1, 0), (-1, 0), (0, 1), (0, -1))
+    for agent_id in server.agents:
+        roll = rng.random()
+        if roll < 0.6:
+            server.submit(agent_id, MOVE, *rng.choice(steps))
+        elif roll < 0.95:
+            server.submit(agent_id, MINE)
+        else:
+            server.submit(agent_id, BUILD, 0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lasttest: viele Bots in einer Welt")
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--tick-rate", type=int, default=20)
+    parser.add_argument("--world-size", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    world = World(32, world_size=args.world_size)
+    server = WorldServer(world)
+    # Bots auf zufällige begehbare Felder setzen
+    while len(server.agents) < args.agents:
+        x = rng.randrange(args.world_size)
+        y = rng.randrange(args.world_size)
+        if world.is_valid_position(x, y):
+            server.add_agent(x, y)
+
+    diff_bytes = []
+    server.subscribe(lambda diff: diff_bytes.append(len(diff.encode())))
+    durations = server.run(args.tick_rate, args.ticks, lambda: random_commands(server, rng))
+
+    ordered = sorted(durations)
+    budget = 1000.0 / args.tick_rate
+    print(f"{args.agents} Agenten, {len(durations)} Ticks: "
+          f"p50 {percentile(ordered, 0.5) * 1000:.2f} ms, "
+          f"p99 {percentile(ordered, 0.99) * 1000:.2f} ms, "
+          f"max {ordered[-1] * 1000:.2f} ms (Budget {budget:.0f} ms)")
+    print(f"Diff im Mittel {sum(diff_bytes) / len(diff_bytes):.0f} Bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""Headless Simulation: spielt Tasteneingaben ohne Display und Bildratenbremse ab.
+
+Die Eingabe ist ein Skript aus Tastennamen (w a s d space b 1-9 return),
+getrennt durch Leerzeichen oder Zeilenumbrüche; "name*N" wiederholt eine
+Taste, # leitet einen Kommentar ein. main.py --record schreibt
+Aufzeichnungen im selben Format. Ohne Skript werden zufällige Tasten aus
+einem festen Seed erzeugt.
+
+Ausgegeben werden Ticks pro Sekunde und ein Hash des Endzustands. Gleiche
+Eingabe muss immer denselben Hash ergeben; mit --expect wird das geprüft
+(Exit-Code 1 bei Abweichung).
+
+    python simulate.py --random 1000000
+    python simulate.py --script replay.txt --expect <hash>
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from main import KEY_NAMES, Game
+
+KEYS = frozenset(KEY_NAMES.values())
+
+# Gewichte für zufällige Eingaben: meist laufen und abbauen
+RANDOM_WEIGHTS = {"w": 6, "a": 6, "s": 6, "d": 6, "space": 8, "b": 1, "1": 1, "return": 1}
+
+
+def parse_script(text):
+    """Zerlegt ein Eingabe-Skript in eine Liste von Tastennamen"""
+    keys = []
+    for line_number, line in enumerate(text.splitlines(), 1):
+        for token in line.split("#", 1)[0].split():
+            key, _, repeat = token.partition("*")
+            if key not in KEYS:
+                raise ValueError(f"Zeile {line_number}: unbekannte Taste {key!r}")
+            keys.extend([key] * (int(repeat) if repeat else 1))
+    return keys
+
+
+def random_keys(count, seed=0):
+    """count zufällige Tasten, reproduzierbar über seed"""
+    rng = random.Random(seed)
+    names = list(RANDOM_WEIGHTS)
+    weights = list(RANDOM_WEIGHTS.values())
+    # In Blöcken ziehen, damit auch Millionen Tasten wenig Speicher brauchen
+    while count > 0:
+        block = min(count, 65536)
+        yield from rng.choices(names, weights, k=block)
+        count -= block
+
+
+def simulate(game, keys, render_every=0):
+    """Spielt keys auf game ab, ein Tick pro Taste.
+
+    render_every > 0 zeichnet jeden n-ten Tick in die Surface im Speicher.
+    Gibt ticks, seconds, ticks_per_second und state_hash zurück.
+    """
+    press = game.press_key
+    ticks = 0
+    start = time.perf_counter()
+    if render_every > 0:
+        for key in keys:
+            press(key)
+            ticks += 1
+            if ticks % render_every == 0:
+                game.update_camera()
+                game.draw()
+    else:
+        for key in keys:
+            press(key)
+            ticks += 1
+    seconds = time.perf_counter() - start
+    return {
+        "ticks": ticks,
+        "seconds": seconds,
+        "ticks_per_second": ticks / seconds if seconds > 0 else 0.0,
+        "state_hash": game.state_hash(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--script", help="Eingabe-Skript oder Aufzeichnung")
+    source.add_argument("--random", type=int, default=100_000, metavar="N",
+                        help="N zufällige Tasten (Standard)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed für --random")
+    parser.add_argument("--infinite", action="store_true", help="Unendliche Welt statt 200x200")
+    parser.add_argument("--world-size", type=int, default=200)
+    parser.add_argument("--render-every", type=int, default=0, metavar="N",
+                        help="Jeden N-ten Tick im Speicher zeichnen (0 = nie)")
+    parser.add_argument("--expect", help="Erwarteter Hash des Endzustands")
+    parser.add_argument("--json", action="store_true", help="Ergebnis als JSON ausgeben")
+    args = parser.parse_args(argv)
+
+    if args.script:
+        with open(args.script) as f:
+            keys = parse_script(f.read())
+    else:
+        keys = random_keys(args.random, args.seed)
+
+    game = Game(save_path=None, world_size=None if args.infinite else args.world_size,
+                headless=True)
+    result = simulate(game, keys, args.render_every)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{result['ticks']} Ticks in {result['seconds']:.3f} s "
+              f"({result['ticks_per_second']:,.0f} Ticks/s)")
+        print(f"Zustand: {result['state_hash']}")
+
+    if args.expect and args.expect != result["state_hash"]:
+        print(f"Abweichung: erwartet {args.expect}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
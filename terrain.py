@@ -0,0 +1,200 @@
+import random
+import numpy as np
+
+# Materialien in ID-Reihenfolge (Index = Material-ID)
+MATERIALS = ("Gras", "Kohle", "Stein", "Wald", "Eisen", "Magnesium")
+MATERIAL_IDS = {name: i for i, name in enumerate(MATERIALS)}
+
+GRAS = MATERIAL_IDS["Gras"]
+KOHLE = MATERIAL_IDS["Kohle"]
+STEIN = MATERIAL_IDS["Stein"]
+WALD = MATERIAL_IDS["Wald"]
+EISEN = MATERIAL_IDS["Eisen"]
+MAGNESIUM = MATERIAL_IDS["Magnesium"]
+
+# Permutationstabelle und Gradienten aus noise/_noise.h (Ken Perlin)
+_PERM_BASE = [
+    151, 160, 137, 91, 90, 15, 131, 13, 201, 95, 96, 53, 194, 233, 7, 225,
+    140, 36, 103, 30, 69, 142, 8, 99, 37, 240, 21, 10, 23, 190, 6, 148, 247,
+    120, 234, 75, 0, 26, 197, 62, 94, 252, 219, 203, 117, 35, 11, 32, 57,
+    177, 33, 88, 237, 149, 56, 87, 174, 20, 125, 136, 171, 168, 68, 175, 74,
+    165, 71, 134, 139, 48, 27, 166, 77, 146, 158, 231, 83, 111, 229, 122,
+    60, 211, 133, 230, 220, 105, 92, 41, 55, 46, 245, 40, 244, 102, 143, 54,
+    65, 25, 63, 161, 1, 216, 80, 73, 209, 76, 132, 187, 208, 89, 18, 169,
+    200, 196, 135, 130, 116, 188, 159, 86, 164, 100, 109, 198, 173, 186, 3,
+    64, 52, 217, 226, 250, 124, 123, 5, 202, 38, 147, 118, 126, 255, 82, 85,
+    212, 207, 206, 59, 227, 47, 16, 58, 17, 182, 189, 28, 42, 223, 183, 170,
+    213, 119, 248, 152, 2, 44, 154, 163, 70, 221, 153, 101, 155, 167, 43,
+    172, 9, 129, 22, 39, 253, 19, 98, 108, 110, 79, 113, 224, 232, 178, 185,
+    112, 104, 218, 246, 97, 228, 251, 34, 242, 193, 238, 210, 144, 12, 191,
+    179, 162, 241, 81, 51, 145, 235, 249, 14, 239, 107, 49, 192, 214, 31,
+    181, 199, 106, 157, 184, 84, 204, 176, 115, 121, 50, 45, 127, 4, 150,
+    254, 138, 236, 205, 93, 222, 114, 67, 29, 24, 72, 243, 141, 128, 195,
+    78, 66, 215, 61, 156, 180
+]
+_PERM = np.array(_PERM_BASE * 2, dtype=np.int32)
+
+_GRAD_X = np.array([1, -1, 1, -1, 1, -1, 1, -1, 0, 0, 0, 0, 1, -1, 0, 0],
+                   dtype=np.float32)
+_GRAD_Y = np.array([1, 1, -1, -1, 0, 0, 0, 0, 1, -1, 1, -1, 0, 0, -1, 1],
+                   dtype=np.float32)
+
+# Gradient je Hash-Index vorberechnet: spart das Nachschlagen PERM[...] & 15
+_PERM_GRAD_X = _GRAD_X[_PERM & 15]
+_PERM_GRAD_Y = _GRAD_Y[_PERM & 15]
+
+_F6 = np.float32(6)
+_F15 = np.float32(15)
+_F10 = np.float32(10)
+_ONE = np.float32(1)
+
+
+def _grad2(p, x, y):
+    """grad2(PERM[p], x, y) aus _perlin.c"""
+    return x * _PERM_GRAD_X[p] + y * _PERM_GRAD_Y[p]
+
+
+def _lerp(t, a, b):
+    return a + t * (b - a)
+
+
+def _noise2(x, y, repeat):
+    """Eine Oktave Perlin Noise, Schritt für Schritt wie noise2() in _perlin.c
+
+    x ist ein Zeilenvektor (1, w), y ein Spaltenvektor (h, 1). Alles, was
+    nur von einer Achse abhängt, wird eindimensional berechnet.
+    """
+    i = np.floor(np.fmod(x, repeat)).astype(np.int32)
+    j = np.floor(np.fmod(y, repeat)).astype(np.int32)
+    ii = np.fmod((i + 1).astype(np.float32), repeat).astype(np.int32)
+    jj = np.fmod((j + 1).astype(np.float32), repeat).astype(np.int32)
+    i &= 255
+    j &= 255
+    ii &= 255
+    jj &= 255
+
+    x = x - np.floor(x)
+    y = y - np.floor(y)
+    fx = x * x * x * (x * (x * _F6 - _F15) + _F10)
+    fy = y * y * y * (y * (y * _F6 - _F15) + _F10)
+
+    A = _PERM[i]
+    AA = _PERM[A + j]
+    AB = _PERM[A + jj]
+    B = _PERM[ii]
+    BA = _PERM[B + j]
+    BB = _PERM[B + jj]
+
+    return _lerp(fy, _lerp(fx, _grad2(AA, x, y),
+                           _grad2(BA, x - _ONE, y)),
+                 _lerp(fx, _grad2(AB, x, y - _ONE),
+                       _grad2(BB, x - _ONE, y - _ONE)))
+
+
+def pnoise2_grid(xs, ys, octaves=1, persistence=0.5, lacunarity=2.0,
+                 repeat=1024.0):
+    """Berechnet noise.pnoise2 für alle Kombinationen aus xs und ys.
+
+    Liefert ein float64-Array der Form (len(ys), len(xs)), dessen Werte
+    bitgenau mit pnoise2(x, y, octaves=...) übereinstimmen. Wie die
+    C-Implementierung wird intern mit float32 gerechnet.
+    """
+    x = np.asarray(xs, dtype=np.float64).astype(np.float32)[np.newaxis, :]
+    y = np.asarray(ys, dtype=np.float64).astype(np.float32)[:, np.newaxis]
+
+    persistence = np.float32(persistence)
+    lacunarity = np.float32(lacunarity)
+    repeat = np.float32(repeat)
+
+    freq = np.float32(1)
+    amp = np.float32(1)
+    max_amp = np.float32(0)
+    total = np.zeros((y.shape[0], x.shape[1]), dtype=np.float32)
+    for _ in range(octaves):
+        total += _noise2(x * freq, y * freq, repeat * freq) * amp
+        max_amp += amp
+        freq *= lacunarity
+        amp *= persistence
+
+    # Vergleiche später in double, wie beim Aufruf aus Python
+    return (total / max_amp).astype(np.float64)
+
+
+def noise_field(x0, y0, width, height, scale=0.1, octaves=4):
+    """Noise-Werte für das Rechteck ab (x0, y0), Form (height, width)"""
+    xs = np.arange(x0, x0 + width, dtype=np.float64) * scale
+    ys = np.arange(y0, y0 + height, dtype=np.float64) * scale
+    return pnoise2_grid(xs, ys, octaves=octaves)
+
+
+def roll_band(noise_vals):
+    """Maske der Tiles, für die generate_world random.random() aufruft"""
+    return (((noise_vals > 0.1) & (noise_vals <= 0.15)) |
+            ((noise_vals > 0.35) & (noise_vals <= 0.4)))
+
+
+def draw_rolls(count):
+    """Zieht count Werte aus dem globalen random-Generator auf einmal.
+
+    Nutzt denselben MT19937-Zustand über NumPy und schreibt den neuen
+    Zustand zurück, sodass die Folge exakt count random.random()-Aufrufen
+    entspricht.
+    """
+    version, internal, gauss_next = random.getstate()
+    rng = np.random.RandomState()
+    rng.set_state(("MT19937", np.array(internal[:-1], dtype=np.uint32),
+                   internal[-1]))
+    rolls = rng.random_sample(count)
+    _, keys, pos = rng.get_state()[:3]
+    random.setstate((version, tuple(int(k) for k in keys) + (int(pos),),
+                     gauss_next))
+    return rolls
+
+
+def classify(noise_vals, rolls):
+    """Bestimmt die Material-IDs aus Noise-Werten und Zufallswerten.
+
+    rolls hat dieselbe Form wie noise_vals und wird nur dort gelesen, wo
+    roll_band() zutrifft.
+    """
+    n = noise_vals
+    conditions = [
+        n < -0.3,
+        n < -0.1,
+        n > 0.4,
+        (n > 0.2) & (n <= 0.35),
+        (n > 0.1) & (n <= 0.15) & (rolls < 0.3),
+        (n > 0.35) & (rolls < 0.1),
+    ]
+    choices = [KOHLE, STEIN, STEIN, WALD, EISEN, MAGNESIUM]
+    return np.select(conditions, choices, default=GRAS).astype(np.uint8)
+
+
+def generate_materials(width, height, seed=42):
+    """Erzeugt das Material-ID-Raster (height, width) wie World.generate_world.
+
+    Die Zufallswerte werden in derselben Reihenfolge gezogen wie in der
+    ursprünglichen Doppelschleife (x außen, y innen).
+    """
+    random.seed(seed)
+    noise_vals = noise_field(0, 0, width, height)
+
+    band = roll_band(noise_vals)
+    rolls = np.ones(noise_vals.shape, dtype=np.float64)
+    # Transponiert -> Reihenfolge x außen, y innen
+    rolls.T[band.T] = draw_rolls(int(band.sum()))
+
+    return classify(noise_vals, rolls)
+
+
+def generate_chunk(cx, cy, size, seed=42):
+    """Erzeugt das Material-ID-Raster (size, size) des Chunks (cx, cy).
+
+    Für die unendliche Welt: Die Zufallswerte stammen aus einem eigenen
+    Generator pro Chunk, damit jeder Chunk unabhängig von den anderen
+    (und in beliebiger Reihenfolge) reproduzierbar ist.
+    """
+    noise_vals = noise_field(cx * size, cy * size, size, size)
+    rng = np.random.default_rng([seed, cx % 2**32, cy % 2**32])
+    rolls = rng.random(noise_vals.shape)
+    return classify(noise_vals, rolls)
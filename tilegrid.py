@@ -0,0 +1,153 @@
+from collections.abc import Mapping
+import numpy as np
+from terrain import MATERIALS, GRAS
+
+
+class TileGrid:
+    """Dichtes Tile-Raster: ein Byte Material-ID pro Tile plus Bitmaske für gesammelt.
+
+    Index eines Tiles ist y * width + x. Die Puffer sind bytearrays, damit
+    Einzelzugriffe billig bleiben; as_arrays() liefert NumPy-Sichten ohne
+    Kopie für Operationen auf ganzen Bereichen.
+    """
+
+    def __init__(self, width, height, materials=None, collected=None):
+        self.width = width
+        self.height = height
+        size = width * height
+        self.materials = bytearray(size) if materials is None else materials
+        self.collected = bytearray((size + 7) // 8) if collected is None else collected
+
+    @classmethod
+    def from_array(cls, material_ids):
+        """Erzeugt ein Raster aus einem (height, width) Array von Material-IDs"""
+        height, width = material_ids.shape
+        return cls(width, height, bytearray(np.ascontiguousarray(material_ids, dtype=np.uint8)))
+
+    @property
+    def nbytes(self):
+        return len(self.materials) + len(self.collected)
+
+    def contains(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def material_id(self, x, y):
+        return self.materials[y * self.width + x]
+
+    def material(self, x, y):
+        return MATERIALS[self.materials[y * self.width + x]]
+
+    def is_collected(self, x, y):
+        i = y * self.width + x
+        return (self.collected[i >> 3] >> (i & 7)) & 1 == 1
+
+    def set_collected(self, x, y, value=True):
+        i = y * self.width + x
+        if value:
+            self.collected[i >> 3] |= 1 << (i & 7)
+        else:
+            self.collected[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+    def is_walkable(self, x, y):
+        """Gras oder bereits gesammelt"""
+        i = y * self.width + x
+        return self.materials[i] == GRAS or (self.collected[i >> 3] >> (i & 7)) & 1 == 1
+
+    def walkable_mask(self):
+        """Begehbarkeit aller Tiles als bool-Array der Form (height, width)"""
+        materials, collected = self.as_arrays()
+        return (materials == GRAS) | collected
+
+    def as_arrays(self):
+        """NumPy-Sichten (Materialien, Gesammelt-Maske) der Form (height, width)"""
+        size = self.width * self.height
+        materials = np.frombuffer(self.materials, dtype=np.uint8).reshape(self.height, self.width)
+        bits = np.unpackbits(np.frombuffer(self.collected, dtype=np.uint8),
+                             count=size, bitorder="little")
+        return materials, bits.reshape(self.height, self.width).astype(bool)
+
+
+class TileRef(Mapping):
+    """Dict-artige Sicht auf ein einzelnes Tile: {"material": ..., "collected": ...}
+
+    Schreiben geht nur als tile["collected"] = True und läuft über
+    World.collect_material, damit Listener, Journal und Rohstoff-Index es
+    mitbekommen. Alles andere ist nur lesbar.
+    """
+
+    __slots__ = ("grid", "x", "y", "world", "position")
+
+    def __init__(self, grid, x, y, world=None, position=None):
+        self.grid = grid
+        self.x = x
+        self.y = y
+        # Welt und Welt-Koordinaten (x, y) für tile["collected"] = True
+        self.world = world
+        self.position = position
+
+    def __getitem__(self, key):
+        if key == "material":
+            return self.grid.material(self.x, self.y)
+        if key == "collected":
+            return self.grid.is_collected(self.x, self.y)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in ("material", "collected"):
+            raise KeyError(key)
+        if key == "collected" and value and self.world is not None:
+            if not self.grid.is_collected(self.x, self.y):
+                self.world.collect_material(*self.position)
+            return
+        raise TypeError(f"Tile-Feld {key!r} ist nur lesbar, gesammelt wird mit World.collect_material")
+
+    def __iter__(self):
+        return iter(("material", "collected"))
+
+    def __len__(self):
+        return 2
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class TilesView(Mapping):
+    """Kompatibilitäts-Sicht im alten Format {(x, y): {"material", "collected"}}
+
+    Lesen und Schreiben gehen über world.get_tile(). Iteriert wird bei
+    begrenzter Welt über alle Tiles, bei unendlicher Welt über die geladenen
+    Chunks.
+    """
+
+    def __init__(self, world):
+        self.world = world
+
+    def __getitem__(self, pos):
+        tile = self.world.get_tile(*pos)
+        if tile is None:
+            raise KeyError(pos)
+        return tile
+
+    def __contains__(self, pos):
+        return self.world.in_bounds(*pos)
+
+    def __iter__(self):
+        world = self.world
+        if world.world_size is not None:
+            # Gleiche Reihenfolge wie das frühere dict (x außen, y innen)
+            for x in range(world.world_size):
+                for y in range(world.world_size):
+                    yield (x, y)
+            return
+
+        size = world.chunk_size
+        for chunk in list(world.chunks):
+            for x in range(chunk.cx * size, (chunk.cx + 1) * size):
+                for y in range(chunk.cy * size, (chunk.cy + 1) * size):
+                    yield (x, y)
+
+    def __len__(self):
+        world = self.world
+        if world.world_size is not None:
+            return world.world_size * world.world_size
+        return len(world.chunks) * world.chunk_size * world.chunk_size
@@ -1,11 +1,28 @@
-import pygame
-import random
-import noise
+import numpy as np
+import pathfinding
+import terrain
+from chunks import CHUNK_SIZE, DEFAULT_MEMORY_BUDGET, Chunk, ChunkCache
+from crafting import default_registry
+from lightmap import LightMap
+from materialindex import MaterialIndex
+from tilegrid import TileGrid, TileRef, TilesView
+
+# So viele Knoten expandiert A* in einer begrenzten Welt, bevor die
+# Breitensuche über die ganze Welt übernimmt (lange Umwege)
+PATH_EXPANSIONS = 20000
 
 class World:
-    def __init__(self, tile_size):
+    def __init__(self, tile_size, world_size=200, chunk_size=CHUNK_SIZE,
+                 memory_budget=DEFAULT_MEMORY_BUDGET, store=None, seed=42,
+                 registry=None):
         self.tile_size = tile_size
-        self.world_size = 200  # 200x200 Raster
+        # 200x200 Raster; None = unendliche Welt aus Chunks, die erst bei
+        # Bedarf generiert werden
+        self.world_size = world_size
+        self.chunk_size = chunk_size
+        self.seed = seed
+        # Gespeicherte Chunks (savegame.ChunkStore), werden statt Generierung geladen
+        self.store = store
         
         # Material-Farben (8-Bit Stil)
         self.colors = {
@@ -17,74 +34,182 @@ class World:
             "Wald": (0, 100, 0)         # Dunkelgrün
         }
         
-        # Spawn-Position in der Mitte
-        self.spawn_x = (self.world_size // 2) * tile_size
-        self.spawn_y = (self.world_size // 2) * tile_size
+        # Spawn-Position in der Mitte (unendliche Welt: Ursprung)
+        center = self.world_size // 2 if self.world_size is not None else 0
+        self.spawn_x = center * tile_size
+        self.spawn_y = center * tile_size
         
-        # Gebäude-System
+        # Gebäude-System; Eigenschaften der Gebäudetypen aus recipes.json
         self.buildings = {}
+        self.registry = registry if registry is not None else default_registry()
+        
+        # Lichtlevel pro Tile, aktualisiert von place_building/remove_building
+        self.light = LightMap()
+        
+        # Ungesammelte Rohstoffe pro Material (Nächster, Umkreis, Rechteck)
+        self.material_index = MaterialIndex(self)
+        
+        # Empfänger für Änderungen an der Welt (z.B. Render-Cache)
+        self.listeners = []
+        # Empfänger für geladene oder generierte Chunks (z.B. Minimap)
+        self.chunk_listeners = []
+        # Empfänger (x, y) für gebaute oder abgerissene Gebäude (z.B. Render-Cache)
+        self.building_listeners = []
+        self.renderer = None
+        
+        # Hintergrund-Generierung (worldgen.ChunkPrefetcher), optional
+        self.prefetcher = None
+        
+        # Änderungs-Journal des Spielstands (journal.Journal), optional
+        self.journal = None
         
-        # Welt generieren
-        self.generate_world()
+        # Zusammenhangskomponenten der begehbaren Tiles (pathfinding.Components),
+        # nur bei begrenzter Welt, beim ersten find_path aufgebaut
+        self.components = None
+        
+        # Chunks werden beim ersten Zugriff geladen oder generiert
+        self.chunks = ChunkCache(chunk_size, self.load_chunk, memory_budget,
+                                 on_evict=self._chunk_evicted, on_load=self._chunk_loaded)
+        
+        # Welt generieren (begrenzte Welt komplett im Voraus, außer sie
+        # kommt aus einem Spielstand)
+        if self.world_size is not None and store is None:
+            self.generate_world()
         
     def generate_world(self):
         """Generiert die Welt mit Perlin Noise"""
-        self.tiles = {}
+        # Noise-Feld und Materialien werden als ganze Arrays berechnet
+        # (Seed 42, gleiche Karte wie die frühere Schleife über pnoise2)
+        material_ids = terrain.generate_materials(self.world_size, self.world_size, seed=self.seed)
         
-        # Seed für reproduzierbare Welten
-        random.seed(42)
+        # Auf volle Chunks auffüllen und zerlegen. Die Zufallswerte hängen von
+        # der ganzen Karte ab, darum sind diese Chunks nicht einzeln
+        # regenerierbar und bleiben immer geladen.
+        size = self.chunk_size
+        count = -(-self.world_size // size)
+        padded = np.zeros((count * size, count * size), dtype=np.uint8)
+        padded[:self.world_size, :self.world_size] = material_ids
+        chunks = []
+        for cx in range(count):
+            for cy in range(count):
+                block = padded[cy * size:(cy + 1) * size, cx * size:(cx + 1) * size]
+                chunks.append(Chunk(cx, cy, TileGrid.from_array(block), pinned=True))
+                self.chunks.add(chunks[-1])
+        # Rohstoff-Zählungen aller Chunks in einem Durchgang
+        self.material_index.build(chunks, padded)
         
-        for x in range(self.world_size):
-            for y in range(self.world_size):
-                # Perlin Noise für natürliche Verteilung
-                noise_val = noise.pnoise2(x * 0.1, y * 0.1, octaves=4)
-                
-                # Material basierend auf Noise-Wert bestimmen
-                if noise_val < -0.3:
-                    material = "Kohle"
-                elif noise_val < -0.1:
-                    material = "Stein"  # Stein ist jetzt häufig
-                elif noise_val > 0.4:
-                    material = "Stein"  # Auch bei hohen Werten
-                elif noise_val > 0.2 and noise_val <= 0.35:
-                    material = "Wald"
-                elif noise_val > 0.1 and noise_val <= 0.15 and random.random() < 0.3:
-                    material = "Eisen"  # Eisen ist jetzt selten
-                elif noise_val > 0.35 and random.random() < 0.1:
-                    material = "Magnesium"  # Selten
-                else:
-                    material = "Gras"
-                    
-                self.tiles[(x, y)] = {
-                    "material": material,
-                    "collected": False
-                }
+    def load_chunk(self, cx, cy):
+        """Liefert das TileGrid des Chunks (cx, cy) aus dem Spielstand oder generiert es"""
+        if self.store is not None and self.store.has(cx, cy):
+            return self.store.map_chunk(cx, cy)
+        return self.generate_chunk(cx, cy)
+        
+    def chunk_available(self, cx, cy):
+        """Kann der Chunk ohne Wartezeit benutzt werden?
+
+        Ohne Hintergrund-Generierung immer True (der Chunk wird bei Bedarf
+        sofort erzeugt). Sonst wird ein fehlender Chunk angefordert.
+        """
+        if self.prefetcher is None or (cx, cy) in self.chunks:
+            return True
+        if self.world_size is not None or (self.store is not None and self.store.has(cx, cy)):
+            return True
+        self.prefetcher.request(cx, cy)
+        # Ein kaputter Pool löst den Prefetcher, dann wird synchron geladen
+        return self.prefetcher is None
+        
+    def install_chunk(self, cx, cy, grid):
+        """Übernimmt einen im Hintergrund generierten Chunk"""
+        if (cx, cy) in self.chunks:
+            return self.chunks.get(cx, cy)
+        chunk = self.chunks.install(cx, cy, grid)
+        # Platzhalter an dieser Stelle ersetzen
+        size = self.chunk_size
+        self._changed(cx * size, cy * size, (cx + 1) * size - 1, (cy + 1) * size - 1)
+        return chunk
+        
+    def _chunk_loaded(self, chunk):
+        for callback in self.chunk_listeners:
+            callback(chunk)
+        
+    def _chunk_evicted(self, chunk):
+        if self.store is not None:
+            self.store.release(chunk.cx, chunk.cy)
+        
+    def generate_chunk(self, cx, cy):
+        """Generiert das TileGrid des Chunks (cx, cy) der unendlichen Welt"""
+        if self.world_size is not None:
+            raise ValueError(f"Chunk ({cx}, {cy}) liegt außerhalb der Welt")
+        return TileGrid.from_array(terrain.generate_chunk(cx, cy, self.chunk_size, seed=self.seed))
+        
+    @property
+    def tiles(self):
+        """Kompatibilitäts-Sicht im alten dict-Format {(x, y): {"material", "collected"}}"""
+        return TilesView(self)
+        
+    def in_bounds(self, x, y):
+        """Liegt (x, y) innerhalb der Welt?"""
+        if self.world_size is None:
+            return True
+        return 0 <= x < self.world_size and 0 <= y < self.world_size
+        
+    def get_chunk(self, x, y):
+        """Gibt den Chunk zurück, der das Tile (x, y) enthält"""
+        return self.chunks.get(x // self.chunk_size, y // self.chunk_size)
                 
     def get_tile(self, x, y):
         """Gibt das Tile an Position (x, y) zurück"""
-        return self.tiles.get((x, y), None)
+        if not self.in_bounds(x, y):
+            return None
+        chunk = self.get_chunk(x, y)
+        return TileRef(chunk.grid, x % self.chunk_size, y % self.chunk_size, self, (x, y))
         
     def is_valid_position(self, x, y):
         """Überprüft ob Position gültig ist"""
-        if not (0 <= x < self.world_size and 0 <= y < self.world_size):
+        if not self.in_bounds(x, y):
             return False
             
         # Nur auf Gras oder gesammelte Felder kann man gehen
-        tile = self.get_tile(x, y)
-        if tile:
-            return tile["material"] == "Gras" or tile["collected"]
-        return False
+        size = self.chunk_size
+        chunk = self.chunks.get(x // size, y // size)
+        walkable = chunk.walkable
+        if walkable is None:
+            walkable = self.chunk_walkable(chunk)
+        return walkable[(y % size) * size + x % size] == 1
+        
+    def chunk_walkable(self, chunk):
+        """Begehbarkeits-Bitmap des Chunks, beim ersten Zugriff aufgebaut"""
+        if chunk.walkable is None:
+            chunk.walkable = bytearray(chunk.grid.walkable_mask().astype(np.uint8).tobytes())
+            self.chunks.account(chunk)
+        return chunk.walkable
         
     def collect_material(self, x, y):
         """Sammelt Material an Position (x, y)"""
-        tile = self.get_tile(x, y)
-        if tile and not tile["collected"] and tile["material"] != "Gras":
-            tile["collected"] = True
+        if not self.in_bounds(x, y):
+            return None
+        size = self.chunk_size
+        chunk = self.chunks.get(x // size, y // size)
+        grid = chunk.grid
+        lx = x % size
+        ly = y % size
+        material_id = grid.material_id(lx, ly)
+        if material_id != terrain.GRAS and not grid.is_collected(lx, ly):
+            self.material_index.collected(chunk, lx, ly, material_id)
+            grid.set_collected(lx, ly)
+            chunk.mark_modified()
+            if chunk.walkable is not None:
+                chunk.walkable[ly * size + lx] = 1
+            if self.components is not None:
+                self.components.add(x, y)
+            self._changed(x, y, x, y)
+            if self.journal is not None:
+                self.journal.collected(x, y)
             # Wald gibt Holz als Ressource
-            if tile["material"] == "Wald":
+            if material_id == terrain.WALD:
                 return "Holz"
             else:
-                return tile["material"]
+                return terrain.MATERIALS[material_id]
         return None
         
     def place_building(self, x, y, building_type):
@@ -92,108 +217,221 @@ class World:
         if self.is_valid_position(x, y):
             self.buildings[(x, y)] = {
                 "type": building_type,
-                "light_range": 4 if building_type == "Lagerfeuer" else 0
+                "light_range": self.registry.light_range(building_type)
             }
+            self.get_chunk(x, y).mark_modified()
+            for callback in self.building_listeners:
+                callback(x, y)
+            rect = self.light.set_source(x, y, self.buildings[(x, y)]["light_range"])
+            self._changed(*(rect or (x, y, x, y)))
+            if self.journal is not None:
+                self.journal.building(x, y, building_type, self.buildings[(x, y)]["light_range"])
             
+    def remove_building(self, x, y):
+        """Entfernt das Gebäude an Position (x, y)"""
+        building = self.buildings.pop((x, y), None)
+        if building is not None:
+            self.get_chunk(x, y).mark_modified()
+            for callback in self.building_listeners:
+                callback(x, y)
+            rect = self.light.remove_source(x, y)
+            self._changed(*(rect or (x, y, x, y)))
+            if self.journal is not None:
+                self.journal.removed(x, y)
+        return building
+            
+    def _window(self, x0, y0, x1, y1, tile_array):
+        """Setzt den Bereich [x0, x1) x [y0, y1) aus Chunk-Arrays zusammen.
+        
+        tile_array(chunk) liefert ein (chunk_size, chunk_size) Array. Das
+        Ergebnis hat ringsum einen Rand von einem Tile; Rand und Tiles
+        außerhalb der Welt sind 0.
+        """
+        window = np.zeros((y1 - y0 + 2, x1 - x0 + 2), dtype=np.uint8)
+        if self.world_size is not None:
+            x0c, y0c = max(x0, 0), max(y0, 0)
+            x1c, y1c = min(x1, self.world_size), min(y1, self.world_size)
+        else:
+            x0c, y0c, x1c, y1c = x0, y0, x1, y1
+        size = self.chunk_size
+        for cx in range(x0c // size, (x1c - 1) // size + 1):
+            for cy in range(y0c // size, (y1c - 1) // size + 1):
+                # Überschneidung von Chunk und Bereich in Welt-Koordinaten
+                ax, ay = max(x0c, cx * size), max(y0c, cy * size)
+                bx, by = min(x1c, (cx + 1) * size), min(y1c, (cy + 1) * size)
+                if ax >= bx or ay >= by:
+                    continue
+                block = tile_array(self.chunks.get(cx, cy))
+                window[ay - y0 + 1:by - y0 + 1, ax - x0 + 1:bx - x0 + 1] = \
+                    block[ay - cy * size:by - cy * size, ax - cx * size:bx - cx * size]
+        return window
+        
+    def walkable_window(self, x0, y0, x1, y1):
+        """Begehbarkeit (1/0) im Bereich [x0, x1) x [y0, y1) mit Rand, siehe _window"""
+        size = self.chunk_size
+        return self._window(x0, y0, x1, y1, lambda chunk: np.frombuffer(
+            self.chunk_walkable(chunk), dtype=np.uint8).reshape(size, size))
+        
+    def find_path(self, start, goal, margin=32, max_margin=256):
+        """Kürzester Weg von start nach goal als Liste von Positionen.
+        
+        Der Weg enthält start nicht, aber goal. Gesucht wird mit A* im
+        Rechteck um start und goal plus margin Tiles Rand. In einer
+        begrenzten Welt sagen vorher die Zusammenhangskomponenten, ob goal
+        überhaupt erreichbar ist (sonst sofort None); braucht A* zu lange
+        oder liegt der Weg außerhalb des Rechtecks, übernimmt eine
+        Breitensuche über die ganze Welt. Bei unendlicher Welt wird das
+        Rechteck verdoppelt und die Suche fortgesetzt, solange sie an
+        dessen Rand stößt, bis max_margin; None heißt dort nur, dass es
+        innerhalb von max_margin Tiles Umweg keinen Weg gibt.
+        """
+        if self.world_size is not None:
+            if not (self.in_bounds(*start) and self.in_bounds(*goal)):
+                return None
+            components = self._components()
+            if not components.connected(start, goal):
+                return None
+            search, x0, y0, width = self._path_search(start, goal, margin)
+            path = search.run(PATH_EXPANSIONS)
+            if path is None:
+                return components.shortest_path(start, goal)
+            return [(i % width + x0 - 1, i // width + y0 - 1) for i in path]
+        
+        search = None
+        while True:
+            if search is None:
+                search, x0, y0, width = self._path_search(start, goal, margin)
+            else:
+                # Bisherige Suche im größeren Rechteck fortsetzen
+                previous_x0, previous_y0 = x0, y0
+                window, x0, y0 = self._path_window(start, goal, margin)
+                width = window.shape[1]
+                search.grow(window.tobytes(), width, previous_x0 - x0, previous_y0 - y0)
+            path = search.run()
+            if path is not None:
+                return [(i % width + x0 - 1, i // width + y0 - 1) for i in path]
+            # Ohne Berührung des Rands hilft auch ein größeres Rechteck nicht
+            if margin >= max_margin or not search.touched_edge():
+                return None
+            margin = min(2 * margin, max_margin)
+        
+    def _path_window(self, start, goal, margin):
+        """Begehbarkeit im Rechteck um start und goal plus margin, mit dessen Ecke (x0, y0)"""
+        (sx, sy), (gx, gy) = start, goal
+        x0 = min(sx, gx) - margin
+        y0 = min(sy, gy) - margin
+        window = self.walkable_window(x0, y0, max(sx, gx) + margin + 1, max(sy, gy) + margin + 1)
+        return window, x0, y0
+        
+    def _path_search(self, start, goal, margin):
+        """A* (pathfinding.PathSearch) im Rechteck, dazu (x0, y0) und Breite des Fensters"""
+        window, x0, y0 = self._path_window(start, goal, margin)
+        width = window.shape[1]
+        (sx, sy), (gx, gy) = start, goal
+        search = pathfinding.PathSearch(window.tobytes(), width,
+                                        (sy - y0 + 1) * width + sx - x0 + 1,
+                                        (gy - y0 + 1) * width + gx - x0 + 1)
+        return search, x0, y0, width
+        
+    def connected(self, a, b):
+        """Sind die Tiles a und b begehbar und durch begehbare Tiles verbunden?"""
+        return self._components().connected(a, b)
+        
+    def _components(self):
+        """Komponenten der begrenzten Welt, beim ersten Aufruf für die ganze
+        Welt beschriftet und danach von collect_material fortgeschrieben"""
+        if self.world_size is None:
+            raise ValueError("Komponenten gibt es nur für begrenzte Welten")
+        if self.components is None:
+            size = self.world_size
+            self.components = pathfinding.Components(
+                self.walkable_window(0, 0, size, size)[1:-1, 1:-1] != 0)
+        return self.components
+        
+    def distance_field(self, x, y, max_steps):
+        """Schritte von (x, y) zu allen Tiles im Umkreis von max_steps.
+        
+        Gibt (x0, y0, distances) zurück: distances[dy, dx] gehört zum Tile
+        (x0 + dx, y0 + dy), -1 heißt nicht erreichbar.
+        """
+        x0, y0 = x - max_steps, y - max_steps
+        window = self.walkable_window(x0, y0, x + max_steps + 1, y + max_steps + 1)
+        height, width = window.shape
+        distances = pathfinding.distance_field(window.ravel(), width,
+                                               (y - y0 + 1) * width + x - x0 + 1, max_steps)
+        return x0, y0, distances.reshape(height, width)[1:-1, 1:-1]
+        
+    def reachable_tiles(self, x, y, max_steps):
+        """Alle Tiles, die von (x, y) in höchstens max_steps Schritten erreichbar sind"""
+        x0, y0, distances = self.distance_field(x, y, max_steps)
+        ys, xs = np.nonzero(distances >= 0)
+        return list(zip((xs + x0).tolist(), (ys + y0).tolist()))
+        
+    def find_nearest_material(self, x, y, material, max_steps=64):
+        """Nächstes ungesammeltes Tile des Materials, das man abbauen kann.
+        
+        Abgebaut wird wie mit Player.mine_right vom linken Nachbarfeld aus.
+        Gibt ((Ziel-x, Ziel-y), (Stand-x, Stand-y), Schritte) zurück oder
+        None, wenn in max_steps Schritten keines erreichbar ist.
+        """
+        material_id = terrain.MATERIAL_IDS[material]
+        if material_id == terrain.GRAS:
+            raise ValueError("Gras kann nicht abgebaut werden")
+        
+        def targets(chunk):
+            materials, collected = chunk.grid.as_arrays()
+            return (materials == material_id) & ~collected
+        
+        # Eine Spalte mehr rechts: das Ziel liegt neben dem Standfeld
+        x0, y0 = x - max_steps, y - max_steps
+        x1, y1 = x + max_steps + 2, y + max_steps + 1
+        window = self.walkable_window(x0, y0, x1, y1)
+        width = window.shape[1]
+        found = pathfinding.find_nearest(window.ravel(),
+                                         self._window(x0, y0, x1, y1, targets).ravel() != 0,
+                                         width, (y - y0 + 1) * width + x - x0 + 1, max_steps)
+        if found is None:
+            return None
+        target, stand, steps = found
+        return ((target % width + x0 - 1, target // width + y0 - 1),
+                (stand % width + x0 - 1, stand // width + y0 - 1), steps)
+        
+    def collected_state(self):
+        """((cx, cy), Gesammelt-Bitmaske) aller Chunks mit gesammelten Tiles, sortiert.
+        
+        Unabhängig vom Inhalt des Caches: geladene Chunks liefern ihre
+        Maske, verdrängte die behaltene, alle übrigen die aus dem Spielstand
+        (gelesen, nicht geladen). Chunks ohne gesammelte Tiles fehlen.
+        """
+        state = {}
+        if self.store is not None:
+            for cx, cy in self.store.on_disk:
+                if (cx, cy) not in self.chunks and (cx, cy) not in self.chunks.evicted_bits:
+                    state[(cx, cy)] = self.store.read_collected(cx, cy)
+        state.update(self.chunks.evicted_bits)
+        for chunk in self.chunks:
+            state[(chunk.cx, chunk.cy)] = bytes(chunk.grid.collected)
+        return sorted((key, collected) for key, collected in state.items()
+                      if collected.strip(b"\0"))
+        
     def get_light_level(self, x, y):
         """Berechnet das Lichtlevel an Position (x, y)"""
-        base_light = 0.3  # Grundhelligkeit
+        return self.light.level(x, y)
         
-        for (bx, by), building in self.buildings.items():
-            if building["light_range"] > 0:
-                distance = max(abs(x - bx), abs(y - by))  # Chebyshev-Distanz
-                if distance <= building["light_range"]:
-                    # Licht wird mit Entfernung schwächer
-                    light_strength = 1.0 - (distance / building["light_range"])
-                    base_light = min(1.0, base_light + light_strength * 0.7)
+    def add_listener(self, callback):
+        """Registriert callback(x0, y0, x1, y1) für geänderte Tile-Bereiche"""
+        self.listeners.append(callback)
         
-        return base_light
+    def _changed(self, x0, y0, x1, y1):
+        for callback in self.listeners:
+            callback(x0, y0, x1, y1)
         
     def draw(self, screen, camera_x, camera_y, screen_width, screen_height):
         """Zeichnet die sichtbare Welt"""
-        # Berechne welche Tiles sichtbar sind
-        start_x = max(0, camera_x // self.tile_size)
-        start_y = max(0, camera_y // self.tile_size)
-        end_x = min(self.world_size, (camera_x + screen_width) // self.tile_size + 1)
-        end_y = min(self.world_size, (camera_y + screen_height) // self.tile_size + 1)
-        
-        for x in range(start_x, end_x):
-            for y in range(start_y, end_y):
-                tile = self.get_tile(x, y)
-                if tile:
-                    screen_x = x * self.tile_size - camera_x
-                    screen_y = y * self.tile_size - camera_y
-                    
-                    # Grundfarbe
-                    color = self.colors.get(tile["material"], (100, 100, 100))
-                    
-                    # Lichtlevel anwenden
-                    light_level = self.get_light_level(x, y)
-                    color = tuple(int(c * light_level) for c in color)
-                    
-                    # Wenn gesammelt, dunkler machen
-                    if tile["collected"]:
-                        color = tuple(max(0, c - 30) for c in color)
-                    
-                    # Tile zeichnen
-                    pygame.draw.rect(screen, color,
-                                   (screen_x, screen_y, self.tile_size, self.tile_size))
-                    
-                    # Spezielle Darstellung für Stein (geriffelt)
-                    if tile["material"] == "Stein" and not tile["collected"]:
-                        # Dunklere Linien für Riffel-Effekt
-                        riffle_color = tuple(max(0, int(c * 0.7)) for c in color)
-                        # Horizontale Linien alle 4 Pixel
-                        for i in range(0, self.tile_size, 4):
-                            pygame.draw.line(screen, riffle_color, 
-                                           (screen_x, screen_y + i), 
-                                           (screen_x + self.tile_size, screen_y + i), 1)
-                        # Vertikale Linien alle 8 Pixel für Kreuzriffeln
-                        for i in range(0, self.tile_size, 8):
-                            pygame.draw.line(screen, riffle_color, 
-                                           (screen_x + i, screen_y), 
-                                           (screen_x + i, screen_y + self.tile_size), 1)
-                    
-                    # Spezielle Darstellung für Eisen (Metallglanz)
-                    if tile["material"] == "Eisen" and not tile["collected"]:
-                        # Hellere Punkte für Metallglanz
-                        base_shine = tuple(min(255, c + 50) for c in self.colors["Eisen"])
-                        shine_color = tuple(int(c * light_level) for c in base_shine)
-                        # Diagonale Glanzpunkte
-                        for i in range(4, self.tile_size - 4, 6):
-                            for j in range(4, self.tile_size - 4, 6):
-                                if (i + j) % 12 == 4:  # Diagonales Muster
-                                    pygame.draw.circle(screen, shine_color,
-                                                     (screen_x + i, screen_y + j), 1)
-                    
-                    # Spezielle Darstellung für Wald (Baum-Muster)
-                    if tile["material"] == "Wald" and not tile["collected"]:
-                        # Hellere Punkte für Baum-Textur
-                        base_tree = tuple(min(255, c + 30) for c in self.colors["Wald"])
-                        tree_color = tuple(int(c * light_level) for c in base_tree)
-                        # Kleine Rechtecke als Bäume
-                        for i in range(4, self.tile_size - 4, 8):
-                            for j in range(4, self.tile_size - 4, 8):
-                                pygame.draw.rect(screen, tree_color,
-                                               (screen_x + i, screen_y + j, 4, 4))
-                    
-                    # Raster-Linien (optional, für 8-Bit Look)
-                    pygame.draw.rect(screen, (50, 50, 50),
-                                   (screen_x, screen_y, self.tile_size, self.tile_size), 1)
-        
-        # Gebäude zeichnen
-        for (bx, by), building in self.buildings.items():
-            if start_x <= bx < end_x and start_y <= by < end_y:
-                screen_x = bx * self.tile_size - camera_x
-                screen_y = by * self.tile_size - camera_y
-                
-                if building["type"] == "Lagerfeuer":
-                    # Lagerfeuer als oranges Quadrat mit Flammen-Effekt
-                    pygame.draw.rect(screen, (255, 140, 0),
-                                   (screen_x, screen_y, self.tile_size, self.tile_size))
-                    # Flammen-Punkte
-                    for i in range(8, self.tile_size - 8, 4):
-                        for j in range(8, self.tile_size - 8, 4):
-                            pygame.draw.circle(screen, (255, 69, 0),
-                                             (screen_x + i, screen_y + j), 2)
-                            
\ No newline at end of file
+        # Vorgerenderte Chunks, erst beim ersten Zeichnen anlegen
+        if self.renderer is None:
+            # render (und damit pygame) erst laden, wenn wirklich gezeichnet
+            # wird; Server und Analyse-Skripte kommen ohne aus
+            from render import WorldRenderer
+            self.renderer = WorldRenderer(self)
+        self.renderer.draw(screen, camera_x, camera_y, screen_width, screen_height)
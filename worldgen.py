@@ -0,0 +1,124 @@
+"""Chunk-Generierung im Hintergrund.
+
+Die Noise-Berechnung ist CPU-lastig, darum läuft sie in einem Prozess-Pool
+statt im Render-Thread. Der ChunkPrefetcher fordert die Chunks in
+Bewegungsrichtung des Spielers vorab an und übergibt fertige Tile-Blöcke
+an World, ohne handle_events/update/draw zu blockieren.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import terrain
+from tilegrid import TileGrid
+
+
+def generate_chunk_bytes(cx, cy, size, seed):
+    """Läuft im Worker-Prozess: Material-IDs des Chunks als bytes"""
+    return terrain.generate_chunk(cx, cy, size, seed=seed).tobytes()
+
+
+class ChunkPrefetcher:
+    """Erzeugt Chunks einer unendlichen Welt in einem Prozess-Pool.
+
+    Höchstens max_pending Aufträge sind gleichzeitig unterwegs. Ändert der
+    Spieler die Richtung, werden noch nicht gestartete Aufträge, die nicht
+    mehr gebraucht werden, abgebrochen. poll() übernimmt pro Aufruf
+    höchstens max_installs fertige Chunks in die Welt.
+
+    Scheitert ein Auftrag, wird der Chunk synchron geladen. Ist der Pool
+    kaputt (z.B. Worker abgestürzt), löst sich der Prefetcher von der Welt,
+    die dann wieder alles synchron lädt.
+    """
+
+    def __init__(self, world, workers=None, max_pending=8, max_installs=4, lookahead=2):
+        self.world = world
+        self.max_pending = max_pending
+        self.max_installs = max_installs
+        self.lookahead = lookahead
+        self.pending = {}
+        self.direction = (0, 0)
+        # "spawn": die Worker erben keinen pygame/SDL-Zustand
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers or max(1, min(4, (os.cpu_count() or 2) - 1)),
+            mp_context=multiprocessing.get_context("spawn"))
+        world.prefetcher = self
+
+    def request(self, cx, cy):
+        """Fordert den Chunk an; gibt False zurück, wenn die Warteschlange voll ist"""
+        key = (cx, cy)
+        if key in self.pending or key in self.world.chunks:
+            return True
+        if len(self.pending) >= self.max_pending or self.world.prefetcher is not self:
+            return False
+        world = self.world
+        try:
+            self.pending[key] = self.executor.submit(generate_chunk_bytes, cx, cy,
+                                                     world.chunk_size, world.seed)
+        except BrokenProcessPool:
+            self._detach()
+            return False
+        return True
+
+    def update(self, grid_x, grid_y, dx, dy):
+        """Plant die Chunks vor dem Spieler (Bewegungsrichtung dx, dy)"""
+        size = self.world.chunk_size
+        pcx = grid_x // size
+        pcy = grid_y // size
+
+        # Nahe Umgebung zuerst, dann in Laufrichtung vorausschauen
+        wanted = [(pcx + ox, pcy + oy) for ox in (-1, 0, 1) for oy in (-1, 0, 1)]
+        if (dx, dy) != (0, 0):
+            for distance in range(2, self.lookahead + 2):
+                ax = pcx + dx * distance
+                ay = pcy + dy * distance
+                # Quer zur Laufrichtung je einen Chunk daneben mitnehmen
+                for side in (-1, 0, 1):
+                    wanted.append((ax + side * dy, ay + side * dx))
+
+        if (dx, dy) != (0, 0) and (dx, dy) != self.direction:
+            self.direction = (dx, dy)
+            keep = set(wanted)
+            for key, future in list(self.pending.items()):
+                if key not in keep and future.cancel():
+                    del self.pending[key]
+
+        for cx, cy in wanted:
+            if not self.request(cx, cy):
+                break
+
+    def poll(self):
+        """Übernimmt fertige Chunks in die Welt, ohne zu warten"""
+        installed = 0
+        size = self.world.chunk_size
+        for key, future in list(self.pending.items()):
+            if installed >= self.max_installs:
+                break
+            if not future.done():
+                continue
+            del self.pending[key]
+            if future.cancelled():
+                continue
+            try:
+                grid = TileGrid(size, size, bytearray(future.result()))
+            except Exception as error:
+                if isinstance(error, BrokenProcessPool):
+                    self._detach()
+                # Nicht auf den Worker verlassen, der Chunk wird synchron geladen
+                grid = self.world.load_chunk(*key)
+            self.world.install_chunk(key[0], key[1], grid)
+            installed += 1
+        return installed
+
+    def shutdown(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self._detach()
+
+    def _detach(self):
+        """Ab jetzt lädt die Welt fehlende Chunks wieder selbst (synchron)"""
+        if self.world.prefetcher is self:
+            self.world.prefetcher = None